@@ -24,10 +24,18 @@ important).
 PROCESS_NAME is matched the same as pgrep(1).  If -f/--full is supplied,
 the name is matched against the full argument list (i.e., 'pgrep -f ...').
 
+Where ionice(1) is available (e.g., Linux), also set the I/O scheduling class
+of the same processes to IO_CLASS ('idle', or 'best-effort' for the lowest
+best-effort priority), unless -I/--no-io is supplied.  If -t/--threads is
+supplied, set the I/O scheduling class of each of their threads.
+
 The default PROCESS_NAMEs are: ${DEFAULT_PROCESS_NAMES}
 
 options:
     -f/--full
+    -i/--io-class IO_CLASS (default: ${IO_CLASS})
+    -I/--no-io
+    -t/--threads
     -n/--dry-run
     -q/--quiet
     -v/--verbose
@@ -75,6 +83,27 @@ GetPidInfo() {
     ps -o pid,nice -p "${pids}"
 }
 
+GetIoTargets() {
+    local pids="$1"
+    local pid
+    local task
+    local IFS=','
+    IO_TARGETS=""
+    for pid in ${pids}; do
+        if [ x"${IO_THREADS}" = x"0" ]; then
+            IO_TARGETS="${IO_TARGETS:+${IO_TARGETS},}${pid}:${pid}"
+            continue
+        fi
+        for task in /proc/${pid}/task/*; do
+            if [ -d "${task}" ]; then
+                IO_TARGETS="${IO_TARGETS:+${IO_TARGETS},}${pid}:${task##*/}"
+            else
+                IO_TARGETS="${IO_TARGETS:+${IO_TARGETS},}${pid}:${pid}"
+            fi
+        done
+    done
+}
+
 Logging() {
     local line
     if [ x"${DRY_RUN}" = x"0" ]; then
@@ -92,6 +121,9 @@ Renice() {
         -v DryRun="${DRY_RUN}" \
         -v Verbose="${VERBOSE}" \
         -v TracePrompt="${PS4:-+ }" \
+        -v IoPrio="${IO_PRIO}" \
+        -v IoClass="${IO_CLASS}" \
+        -v IoTargets="${IO_TARGETS}" \
         'BEGIN {
             n = 0
             RenicePids[n] = ""
@@ -100,6 +132,7 @@ Renice() {
         !/PID/ {
             Pid = $1
             Nice = $2
+            Live[Pid] = 1
             if (Nice < 20) {
                 n += 1
                 RenicePids[n] = Pid
@@ -129,6 +162,66 @@ Renice() {
             if (!DryRun) {
                 system(Command)
             }
+
+            if (!IoPrio) {
+                exit
+            }
+
+            # IoTargets is a list of pid:tid pairs (or pid:pid without threads)
+            Tids = ""
+            NumTargets = split(IoTargets, Targets, ",")
+            for (i = 1; i <= NumTargets; i++) {
+                split(Targets[i], Target, ":")
+                if (Target[1] in Live) {
+                    Tids = Tids " " Target[2]
+                }
+            }
+            # Skip anything already at (or below) the target I/O priority
+            if ("idle" == IoClass) {
+                IoArgs = "-c 3"
+                SkipIoClasses = "^idle$"
+            } else {
+                IoArgs = "-c 2 -n 7"
+                SkipIoClasses = "^(idle|best-effort: prio 7)$"
+            }
+            # Query all at once; prints one line per tid, in order (stopping
+            # early if any has gone away)
+            m = 0
+            if ("" != Tids) {
+                Query = "ionice -p" Tids " 2>/dev/null"
+                while ((Query | getline Line) > 0) {
+                    m += 1
+                    IoClasses[m] = Line
+                }
+                close(Query)
+            }
+            Command = ""
+            NumTids = split(Tids, IoTids, " ")
+            for (i = 1; i <= NumTids; i++) {
+                if ((i in IoClasses) && (IoClasses[i] ~ SkipIoClasses)) {
+                    continue
+                }
+                if ("" == Command) {
+                    if (MyUid != 0) {
+                        Command = Command "sudo "
+                    }
+                    Command = Command "ionice " IoArgs " -p"
+                }
+                Command = Command " " IoTids[i]
+            }
+            if (DryRun || Verbose) {
+                if (("" == Command) && (Verbose > 1)) {
+                    print("No pids to ionice")
+                } else if ("" != Command) {
+                    if (DryRun) {
+                        print "[DRY-RUN] Would run:"
+                    }
+                    print(TracePrompt Command)
+                }
+            }
+            if (!DryRun && ("" != Command)) {
+                system(Command)
+            }
         }
     '
 }
@@ -138,6 +231,9 @@ Renice() {
 PGREP_FULL=0
 DRY_RUN=0
 VERBOSE=1
+IO_PRIO=1
+IO_CLASS="idle"
+IO_THREADS=0
 
 while [ $# -gt 0 ]; do
     case "$1" in
@@ -148,6 +244,30 @@ while [ $# -gt 0 ]; do
             PGREP_FULL=1
             shift
             ;;
+        -i|--io-class)
+            if [ $# -lt 2 ]; then
+                echo "$0: error: option '$1' requires an argument" >&2
+                exit 1
+            fi
+            case "$2" in
+                idle|best-effort)
+                    IO_CLASS="$2"
+                    ;;
+                *)
+                    echo "$0: error: unrecognized I/O class '$2'" >&2
+                    exit 1
+                    ;;
+            esac
+            shift 2
+            ;;
+        -I|--no-io)
+            IO_PRIO=0
+            shift
+            ;;
+        -t|--threads)
+            IO_THREADS=1
+            shift
+            ;;
         -n|--dry-run|--dryrun)
             DRY_RUN=1
             shift
@@ -186,6 +306,18 @@ fi
 
 PIDS="`GetPids ${1:+"$@"} | FormatPids`"
 
+if [ x"${IO_PRIO}" = x"1" ] && ! command -v ionice >/dev/null 2>&1; then
+    if [ x"${VERBOSE}" = x"2" ]; then
+        echo "No ionice command; not changing I/O priorities" >&2
+    fi
+    IO_PRIO=0
+fi
+
+IO_TARGETS=""
+if [ x"${IO_PRIO}" = x"1" ]; then
+    GetIoTargets "${PIDS}"
+fi
+
 GetPidInfo ${PIDS} \
 | Renice \
 | Logging
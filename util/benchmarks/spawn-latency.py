@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+"""Measure `run_command()` spawn latency against the size of the parent process."""
+
+from __future__ import print_function
+
+import os.path
+import sys
+
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
+
+DEFAULT_SIZES = "0,256,1024,4096"
+DEFAULT_REPEAT = 50
+DEFAULT_COMMAND = ["true"]
+
+MIB = 1024 * 1024
+
+
+def _get_rss_mib():
+    """Return the resident set size of this process in MiB, if known."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except (IOError, OSError):
+        pass
+    return None
+
+
+def _measure(command, repeat, use_posix_spawn):
+    """Return the median latency in milliseconds of running `command`."""
+    runcommand.USE_POSIX_SPAWN = use_posix_spawn
+    timings = []
+
+    def _record(record):
+        timings.append(record["elapsed"])
+
+    runcommand.add_command_hook(_record)
+    try:
+        for _ in range(repeat):
+            runcommand.run_command(command, check=True)
+    finally:
+        runcommand.remove_command_hook(_record)
+    timings.sort()
+    return 1000.0 * timings[len(timings) // 2]
+
+
+def _add_arguments(argparser):
+    """Add command-line arguments to an argument parser"""
+    argparser.add_argument(
+        "-s",
+        "--sizes",
+        dest="sizes",
+        action="store",
+        default=DEFAULT_SIZES,
+        help=(
+            "Comma-separated list of extra memory to allocate in the parent "
+            "process before each measurement, in MiB (default: {default})"
+        ).format(default=DEFAULT_SIZES),
+    )
+    argparser.add_argument(
+        "-r",
+        "--repeat",
+        dest="repeat",
+        action="store",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=(
+            "Number of times to run the command per measurement (default: {default})"
+        ).format(default=DEFAULT_REPEAT),
+    )
+    argparser.add_argument(
+        "command",
+        nargs="*",
+        default=DEFAULT_COMMAND,
+        help="Command to run (default: {default})".format(
+            default=" ".join(DEFAULT_COMMAND)
+        ),
+    )
+    return argparser
+
+
+def main(*argv):
+    """Do the thing"""
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(prog=prog, description=__doc__)
+    _add_arguments(argparser)
+    args = argparser.parse_args(argv)
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    spawn_paths = [(runcommand.SPAWN_SUBPROCESS, False)]
+    if hasattr(os, "posix_spawn"):
+        spawn_paths.append((runcommand.SPAWN_POSIX, True))
+    else:
+        print(
+            "{prog}: warning: os.posix_spawn() is not available".format(prog=prog),
+            file=sys.stderr,
+        )
+
+    print(
+        "{0:>10}  {1:>10}  ".format("EXTRA_MIB", "RSS_MIB")
+        + "  ".join("{0:>14}".format(name + "_ms") for (name, _) in spawn_paths)
+    )
+    ballast = None
+    for size in sizes:
+        # Multiplying (rather than zero-filling) touches every page
+        ballast = None  # Release the previous allocation first
+        ballast = bytearray(b"\x01") * (size * MIB)
+        rss = _get_rss_mib()
+        latencies = [
+            _measure(args.command, args.repeat, use_posix_spawn)
+            for (_, use_posix_spawn) in spawn_paths
+        ]
+        print(
+            "{0:>10}  {1:>10}  ".format(size, "-" if rss is None else int(rss))
+            + "  ".join("{0:>14.3f}".format(x) for x in latencies)
+        )
+    del ballast
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""Measure the startup time of each `utiltool.py` subcommand."""
+
+from __future__ import print_function
+
+import json
+import os.path
+import subprocess
+import sys
+
+UTIL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, UTIL_DIR)
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
+
+DEFAULT_REPEAT = 20
+
+# Run in a fresh interpreter: load a subcommand's module the same way
+# `utiltool.py` does (without running it), and report how long that took and
+# how many modules it imported.
+LOAD_SUBCOMMAND_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+before = set(sys.modules)
+start = time.time()
+import utiltool
+utiltool.subcommands.load_subcommand(sys.argv[2], utiltool.SUBCOMMANDS, sys.argv[1])
+elapsed = time.time() - start
+print(json.dumps({"elapsed": elapsed, "modules": len(set(sys.modules) - before)}))
+"""
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def _measure(subcommand, repeat):
+    """Return (process_ms, load_ms, module_count) medians for `subcommand`."""
+    process_timings = []
+
+    def _record(record):
+        process_timings.append(record["elapsed"])
+
+    load_timings = []
+    module_counts = []
+    runcommand.add_command_hook(_record)
+    try:
+        for _ in range(repeat):
+            output = runcommand.run_command(
+                [sys.executable, "-c", LOAD_SUBCOMMAND_SCRIPT, UTIL_DIR, subcommand],
+                return_output=True,
+            )
+            result = json.loads(output)
+            load_timings.append(result["elapsed"])
+            module_counts.append(result["modules"])
+    finally:
+        runcommand.remove_command_hook(_record)
+    return (
+        1000.0 * _median(process_timings),
+        1000.0 * _median(load_timings),
+        _median(module_counts),
+    )
+
+
+def _add_arguments(argparser):
+    """Add command-line arguments to an argument parser"""
+    argparser.add_argument(
+        "-r",
+        "--repeat",
+        dest="repeat",
+        action="store",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Number of times to start each subcommand (default: {default})".format(
+            default=DEFAULT_REPEAT
+        ),
+    )
+    argparser.add_argument(
+        "subcommands",
+        metavar="SUBCOMMAND",
+        nargs="*",
+        help="Subcommand(s) to measure (default: all)",
+    )
+    return argparser
+
+
+def main(*argv):
+    """Do the thing"""
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(prog=prog, description=__doc__)
+    _add_arguments(argparser)
+    args = argparser.parse_args(argv)
+
+    if not args.subcommands:
+        output = runcommand.run_command(
+            [
+                sys.executable,
+                "-c",
+                "import sys; sys.path.insert(0, sys.argv[1]); import utiltool; "
+                "print('\\n'.join(x[0] for x in utiltool.SUBCOMMANDS))",
+                UTIL_DIR,
+            ],
+            return_output=True,
+        )
+        args.subcommands = output.split()
+
+    print(
+        "{0:<20}  {1:>10}  {2:>10}  {3:>7}".format(
+            "SUBCOMMAND", "PROCESS_MS", "LOAD_MS", "MODULES"
+        )
+    )
+    for subcommand in args.subcommands:
+        try:
+            (process_ms, load_ms, module_count) = _measure(subcommand, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print("{prog}: error: {e}".format(prog=prog, e=e), file=sys.stderr)
+            return 1
+        print(
+            "{0:<20}  {1:>10.2f}  {2:>10.2f}  {3:>7}".format(
+                subcommand, process_ms, load_ms, module_count
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv))
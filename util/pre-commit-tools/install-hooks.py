@@ -5,10 +5,15 @@
 from __future__ import print_function
 
 import os.path
-import subprocess
 import sys
 
-TRACE_PREFIX = "+"
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.hookenv as hookenv  # noqa: E402
+import utilutil.profiling as profiling  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
 
 CONFIG = ".pre-commit-config.yaml"
 
@@ -30,15 +35,29 @@ INSTALL_HOOKS_COMMAND = [
 ]
 
 
-def main():
+def main(*argv):
     """Run the pre-commit command to install hooks."""
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(prog=prog, description=__doc__)
+    argparsing.add_profile_arguments(argparser)
+    argparsing.add_hook_cache_arguments(argparser, hookenv.CACHE_DIR_ENV_VAR)
+    args = argparser.parse_args(argv)
+    profiling.setup_profiling(args)
+
     if not os.path.exists(CONFIG):
         print(CONFIG_NOT_FOUND_MESSAGE, file=sys.stderr)
 
-    print(" ".join([TRACE_PREFIX] + INSTALL_HOOKS_COMMAND), file=sys.stderr)
-    status = subprocess.call(INSTALL_HOOKS_COMMAND)
-    sys.exit(status)
+    env = hookenv.setup_environment(
+        cache_dir=args.cache_dir,
+        mirror_dir=args.mirror_dir,
+        offline=args.offline,
+        config_path=CONFIG,
+    )
+    status = runcommand.run_command(
+        INSTALL_HOOKS_COMMAND, check=False, show_trace=True, env=env
+    )
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(*sys.argv))
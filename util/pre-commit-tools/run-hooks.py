@@ -1,13 +1,24 @@
 #!/usr/bin/env python
 
-"""Run pre-commit hooks."""
+"""Run pre-commit hooks.
+
+With ``--incremental``, only check files which have changed (or whose hooks have
+changed) since they last passed.  With ``--parallel``, run each hook separately,
+several at once.
+"""
 
 from __future__ import print_function
 
-import subprocess
+import functools
+import os.path
 import sys
 
-TRACE_PREFIX = "+"
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.profiling as profiling  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
 
 RUN_HOOKS_COMMAND = [
     "pre-commit",
@@ -15,31 +26,6 @@ RUN_HOOKS_COMMAND = [
 ]
 
 
-def grok_args(args):
-    """
-    Figure out whether we have any arguments and extract the program "name".
-
-    :Args:
-        args
-            A list of program arguments, including the program "name" as the
-            zero-th argument (see `sys.argv`:py:attr:)
-
-    :Returns:
-        A best guess at (`prog`, `args`), where:
-
-        - `prog` is the program "name"
-        - `args` is the list of program arguments, beginning with the first
-          argument (i.e., _not_ including the program name)
-    """
-    if not args:
-        args = sys.argv
-    try:
-        prog = args[0]
-    except IndexError:
-        prog = None
-    return (prog, args[1:])
-
-
 def filter_args(args):
     """Add needed arguments to `args` only when needed."""
     for arg in ["-a", "--all-files", "-h", "--help", "--files"]:
@@ -48,15 +34,39 @@ def filter_args(args):
     return ["--all-files"] + args
 
 
-def main():
+def main(*argv):
     """Run the pre-commit command to run hooks."""
-    (_prog, args) = grok_args(sys.argv)
+    (_prog, args) = argparsing.grok_argv(argv)
+    (options, args) = argparsing.parse_passthrough_arguments(
+        args,
+        argparsing.add_profile_arguments,
+        argparsing.add_incremental_argument,
+        argparsing.add_parallel_arguments,
+    )
+    profiling.setup_profiling(options)
+    if options.parallel and not ("-h" in args or "--help" in args):
+        # pylint: disable-next=import-outside-toplevel
+        import utilutil.hookrunner as hookrunner
+
+        run = functools.partial(
+            hookrunner.run_parallel,
+            jobs=options.jobs,
+            read_only_hooks=options.read_only_hooks,
+        )
+    else:
+        run = functools.partial(runcommand.run_command, check=False, show_trace=True)
+
+    if options.incremental and filter_args(args) != args:
+        # pylint: disable-next=import-outside-toplevel
+        import utilutil.hookcache as hookcache
+
+        return hookcache.run_incremental(RUN_HOOKS_COMMAND + args, run=run)
+
     args = filter_args(args)
     command = RUN_HOOKS_COMMAND + args
-    print(" ".join([TRACE_PREFIX] + command), file=sys.stderr)
-    status = subprocess.call(command)
-    sys.exit(status)
+    status = run(command)
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(*sys.argv))
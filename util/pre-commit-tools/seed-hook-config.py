@@ -8,7 +8,12 @@ import os.path
 import subprocess
 import sys
 
-TRACE_PREFIX = "+"
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.profiling as profiling  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
 
 CONFIG = ".pre-commit-config.yaml"
 
@@ -28,10 +33,10 @@ SAMPLE_CONFIG_COMMAND = [
 
 def print_sample_config(outfile=sys.stdout):
     """Print a sample config to `outfile`."""
-    print(" ".join([TRACE_PREFIX] + SAMPLE_CONFIG_COMMAND), file=sys.stderr)
-
     try:
-        output = subprocess.check_output(SAMPLE_CONFIG_COMMAND, universal_newlines=True)
+        output = runcommand.run_command(
+            SAMPLE_CONFIG_COMMAND, return_output=True, show_trace=True
+        )
     except subprocess.CalledProcessError as e:
         return e.returncode
 
@@ -40,8 +45,14 @@ def print_sample_config(outfile=sys.stdout):
     return 0
 
 
-def main():
+def main(*argv):
     """Run the pre-commit command to print a sample config."""
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(prog=prog, description=__doc__)
+    argparsing.add_profile_arguments(argparser)
+    args = argparser.parse_args(argv)
+    profiling.setup_profiling(args)
+
     if os.path.exists(CONFIG):
         print(CONFIG_FOUND_MESSAGE, file=sys.stderr)
         status = print_sample_config()
@@ -49,8 +60,8 @@ def main():
         with open(CONFIG, "w") as outfile:
             status = print_sample_config(outfile=outfile)
 
-    sys.exit(status)
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(*sys.argv))
@@ -4,10 +4,16 @@
 
 from __future__ import print_function
 
-import subprocess
+import os.path
 import sys
 
-TRACE_PREFIX = "+"
+# Make `utilutil` importable when run as a script from any directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import utilutil.argparsing as argparsing  # noqa: E402
+import utilutil.hookenv as hookenv  # noqa: E402
+import utilutil.profiling as profiling  # noqa: E402
+import utilutil.runcommand as runcommand  # noqa: E402
 
 AUTOUPDATE_COMMAND = [
     "pre-commit",
@@ -15,39 +21,24 @@ AUTOUPDATE_COMMAND = [
 ]
 
 
-def grok_args(args):
-    """
-    Figure out whether we have any arguments and extract the program "name".
-
-    :Args:
-        args
-            A list of program arguments, including the program "name" as the
-            zero-th argument (see `sys.argv`:py:attr:)
-
-    :Returns:
-        A best guess at (`prog`, `args`), where:
-
-        - `prog` is the program "name"
-        - `args` is the list of program arguments, beginning with the first
-          argument (i.e., _not_ including the program name)
-    """
-    if not args:
-        args = sys.argv
-    try:
-        prog = args[0]
-    except IndexError:
-        prog = None
-    return (prog, args[1:])
-
-
-def main():
+def main(*argv):
     """Run the pre-commit command to update hooks."""
-    (_prog, args) = grok_args(sys.argv)
+    (_prog, args) = argparsing.grok_argv(argv)
+    (options, args) = argparsing.parse_passthrough_arguments(
+        args,
+        argparsing.add_profile_arguments,
+        lambda x: argparsing.add_hook_cache_arguments(x, hookenv.CACHE_DIR_ENV_VAR),
+    )
+    profiling.setup_profiling(options)
+    env = hookenv.setup_environment(
+        cache_dir=options.cache_dir,
+        mirror_dir=options.mirror_dir,
+        offline=options.offline,
+    )
     command = AUTOUPDATE_COMMAND + args
-    print(" ".join([TRACE_PREFIX] + command), file=sys.stderr)
-    status = subprocess.call(command)
-    sys.exit(status)
+    status = runcommand.run_command(command, check=False, show_trace=True, env=env)
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(*sys.argv))
@@ -4,11 +4,11 @@ from __future__ import print_function
 
 import os
 import os.path
-import random
 import subprocess
 import sys
 
 import utilutil.argparsing as argparsing
+import utilutil.profiling as profiling
 import utilutil.runcommand as runcommand
 
 DEFAULT_VERSION_FILENAME = "VERSION"
@@ -24,6 +24,31 @@ DESCRIPTION = (
 DEFAULT_TAG_PREFIX = "v"
 DEFAULT_TAG_SUFFIX = ""
 
+DEFAULT_BATCH_JOBS = 4
+
+# Remote to which tags are pushed
+PUSH_REMOTE = "origin"
+
+# Keys allowed in each repository entry of a batch manifest, and the
+# corresponding argument destinations (`None` means handled specially)
+MANIFEST_KEYS = {
+    "path": None,
+    "version_file": None,
+    "prefix": "tag_prefix",
+    "suffix": "tag_suffix",
+    "commit": "commit",
+    "message": "message",
+    "stable": "stable",
+}
+
+# Version of the JSON format written by '--plan', and the kinds of steps a plan
+# may contain (see `_run_plan()`)
+PLAN_FORMAT = 1
+PLAN_KEYS = frozenset(
+    ["format", "project_dir", "version", "tag", "stable_tag", "branch", "refs", "steps"]
+)
+PLAN_STEP_KEYS = frozenset(["run", "message", "confirm", "store_stable_version"])
+
 SAFETY_MESSAGES = [
     "Make sure there are sufficient parallel universes available.",
     "Are you wearing your paradox protection headgear?",
@@ -38,17 +63,42 @@ SAFETY_MESSAGES = [
 ]
 
 
+# Modules needed only for less common operations are imported where they are
+# used, to keep startup fast (e.g., for '--help' or from git hooks)
+
+
 def _get_safety_message():
+    import random  # pylint: disable=import-outside-toplevel
+
     return random.choice(SAFETY_MESSAGES)
 
 
-def _get_project_dir():
+def _git_command(repo_dir, *words):
+    """Return a git command line, to be run in `repo_dir` if it is not `None`"""
+    command = ["git"]
+    if repo_dir is not None:
+        command.extend(["-C", repo_dir])
+    command.extend(words)
+    return command
+
+
+def _output_kwargs(msgfile, return_output=False):
+    """Return keyword arguments for sending command output to `msgfile`"""
+    if msgfile is None:
+        return {}
+    if return_output:
+        return {"stderr": msgfile}
+    return {"stdout": msgfile, "stderr": subprocess.STDOUT}
+
+
+def _get_project_dir(repo_dir=None, msgfile=None):
     """Return the top-level directory of the current Git project"""
     project_dir = runcommand.run_command(
-        ["git", "rev-parse", "--show-toplevel"],
+        _git_command(repo_dir, "rev-parse", "--show-toplevel"),
         dry_run=False,
         return_output=True,
         show_trace=False,
+        **_output_kwargs(msgfile, return_output=True)
     )
     return project_dir[:-1] if project_dir.endswith("\n") else project_dir
 
@@ -58,7 +108,7 @@ def _get_project_version(version_file):
     version = version_file.read().lstrip().splitlines()
     if not version:
         raise RuntimeError(
-            "{path}: version file appears to be blank".format(path=version_file.path)
+            "{path}: version file appears to be blank".format(path=version_file.name)
         )
     return version[0].rstrip()
 
@@ -67,6 +117,7 @@ def _add_arguments(argparser):
     """Add command-line arguments to an argument parser"""
     argparsing.add_dry_run_argument(argparser)
     argparsing.add_chdir_argument(argparser)
+    argparsing.add_profile_arguments(argparser)
     prefix_args = argparser.add_mutually_exclusive_group(required=False)
     prefix_args.add_argument(
         "-p",
@@ -138,6 +189,17 @@ def _add_arguments(argparser):
         action="store_true",
         help="Push the tags after creating them.",
     )
+    argparser.add_argument(
+        "--atomic",
+        dest="atomic",
+        action="store_true",
+        default=False,
+        help=(
+            "Push the branch (with --stable) and all tags using a single atomic "
+            "'git push', so that either all refs are updated or none are "
+            "(implies --push)."
+        ),
+    )
     argparser.add_argument(
         "-S",
         "--stable",
@@ -176,6 +238,56 @@ def _add_arguments(argparser):
             "(default: '{default}' in root of project)"
         ).format(default=DEFAULT_STABLE_VERSION_FILENAME),
     )
+    mode_args = argparser.add_mutually_exclusive_group(required=False)
+    mode_args.add_argument(
+        "--plan",
+        dest="plan_file",
+        action="store",
+        default=None,
+        metavar="FILE",
+        help=(
+            "Write the resolved version, tags, refs the plan depends on, and "
+            "commands to run as JSON to FILE ('-' for standard output), then "
+            "show what would be done (implies --dry-run)"
+        ),
+    )
+    mode_args.add_argument(
+        "--apply-plan",
+        dest="apply_plan_file",
+        action="store",
+        default=None,
+        metavar="FILE",
+        help=(
+            "Run the commands in a plan written using --plan ('-' for standard "
+            "input), after checking that the refs it depends on have not "
+            "changed (other tagging options are ignored)"
+        ),
+    )
+    mode_args.add_argument(
+        "--batch",
+        dest="batch_manifest",
+        action="store",
+        default=None,
+        metavar="MANIFEST",
+        help=(
+            "Tag each of the repositories listed in MANIFEST, a JSON list of "
+            "objects with a 'path' and optional 'version_file', 'prefix', "
+            "'suffix', 'commit', 'message', and 'stable' (paths are relative to "
+            "MANIFEST; other options apply to every repository)"
+        ),
+    )
+    argparser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        action="store",
+        type=int,
+        default=DEFAULT_BATCH_JOBS,
+        help=(
+            "With --batch, the number of repositories to work on at once "
+            "(default: {default})"
+        ).format(default=DEFAULT_BATCH_JOBS),
+    )
     argparser.add_argument(
         "-T",
         "--time-travel",
@@ -200,26 +312,127 @@ def _add_arguments(argparser):
     return argparser
 
 
-def _does_tag_exist(tag):
-    tags = runcommand.run_command(
-        ["git", "tag", "--list", tag],
-        check=False,
-        return_output=True,
-        show_trace=True,
-        dry_run=False,
+def _get_ref_objects(refs, repo_dir=None, msgfile=None):
+    """
+    Look up several refs (or other revisions) at once.
+
+    Returns a dictionary mapping each of `refs` to the name of the object it
+    refers to, or `None` if it does not exist.
+    """
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    refs = list(refs)
+    objects = []
+    with tempfile.TemporaryFile(mode="w+") as ref_list:
+        ref_list.write("".join(ref + "\n" for ref in refs))
+        ref_list.flush()
+        ref_list.seek(0)
+        for line in runcommand.iter_output(
+            _git_command(repo_dir, "cat-file", "--batch-check=%(objectname)"),
+            show_trace=True,
+            msgfile=msgfile,
+            stdin=ref_list,
+            **_output_kwargs(msgfile, return_output=True)
+        ):
+            # Refs that do not exist are reported as "<ref> missing" (or
+            # "ambiguous")
+            line = line.rstrip("\n")
+            objects.append(None if " " in line else line)
+    return dict(zip(refs, objects))
+
+
+def _get_branch_ref(repo_dir=None, msgfile=None):
+    """Return the ref for the current branch, or `None` if HEAD is detached"""
+    try:
+        return runcommand.run_command(
+            _git_command(repo_dir, "symbolic-ref", "--quiet", "HEAD"),
+            dry_run=False,
+            return_output=True,
+            show_trace=False,
+            **_output_kwargs(msgfile, return_output=True)
+        ).strip()
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _get_config_value(key, repo_dir=None, msgfile=None):
+    """Return the value of git configuration `key`, or `None` if it is not set"""
+    try:
+        return runcommand.run_command(
+            _git_command(repo_dir, "config", "--get", key),
+            dry_run=False,
+            return_output=True,
+            show_trace=False,
+            **_output_kwargs(msgfile, return_output=True)
+        ).strip()
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _get_branch_refspec(branch_ref, repo_dir=None, msgfile=None):
+    """
+    Return a refspec for pushing `branch_ref` to its upstream branch on
+    `PUSH_REMOTE`, where the version tags are pushed.
+
+    Raises `RuntimeError` if a plain 'git push' from that branch would push to
+    some other remote.
+    """
+    if branch_ref is None:
+        raise RuntimeError("HEAD is not on a branch; cannot push it")
+    branch = branch_ref[len("refs/heads/") :]
+    # Same order of precedence as 'git push' uses
+    for key in [
+        "branch.{branch}.pushRemote".format(branch=branch),
+        "remote.pushDefault",
+        "branch.{branch}.remote".format(branch=branch),
+    ]:
+        remote = _get_config_value(key, repo_dir=repo_dir, msgfile=msgfile)
+        if remote is not None:
+            break
+    if remote is not None and remote != PUSH_REMOTE:
+        raise RuntimeError(
+            (
+                "branch '{branch}' pushes to remote '{remote}', not '{push_remote}'; "
+                "cannot push it and the tags atomically"
+            ).format(branch=branch, remote=remote, push_remote=PUSH_REMOTE)
+        )
+    upstream_ref = _get_config_value(
+        "branch.{branch}.merge".format(branch=branch),
+        repo_dir=repo_dir,
+        msgfile=msgfile,
     )
-    return tag in tags.split("\n")
+    if upstream_ref is None:
+        upstream_ref = branch_ref
+    return "{src}:{dst}".format(src=branch_ref, dst=upstream_ref)
 
 
 def _should_continue(
-    prompt="Are you sure you want to do this (yes/no)? ", dry_run=False
+    prompt="Are you sure you want to do this (yes/no)? ",
+    dry_run=False,
+    interactive=True,
+    msgfile=None,
 ):
     if dry_run:
+        if interactive:
+            message = ["Would prompt:", prompt]
+        else:
+            message = [
+                "Cannot prompt in batch mode; would need --accept-paradoxes to proceed"
+            ]
         runcommand.print_trace(
-            ["Would prompt:", prompt], trace_prefix="", dry_run=dry_run
+            message, trace_prefix="", dry_run=dry_run, msgfile=msgfile
         )
         return True
 
+    if not interactive:
+        runcommand.print_trace(
+            ["Cannot prompt in batch mode; use --accept-paradoxes to proceed"],
+            trace_prefix="",
+            dry_run=dry_run,
+            msgfile=msgfile,
+        )
+        return False
+
     try:
         get_input = raw_input
     except NameError:
@@ -230,55 +443,68 @@ def _should_continue(
     return text in {"yes", "y", "1", "t", "true", "go ahead", "ok", "why not?"}
 
 
-def _store_stable_version(version, stable_version_file, dry_run):
+def _store_stable_version(
+    version, stable_version_file, dry_run, repo_dir=None, msgfile=None
+):
     if os.path.exists(stable_version_file):
         runcommand.print_trace(
             ["Storing", version, "as stable version ..."],
             trace_prefix="",
             dry_run=dry_run,
+            msgfile=msgfile,
         )
         if not dry_run:
             with open(stable_version_file, "w") as f:
                 f.write(version + "\n")
         status = runcommand.run_command(
-            ["git", "diff", "-s", "--exit-code", stable_version_file],
+            _git_command(repo_dir, "diff", "-s", "--exit-code", stable_version_file),
             check=False,
             show_trace=True,
             dry_run=dry_run,
+            msgfile=msgfile,
+            **_output_kwargs(msgfile)
         )
         if dry_run or status == 1:
-            commit_command = [
-                "git",
+            commit_command = _git_command(
+                repo_dir,
                 "commit",
                 "-m",
                 "Update stable version to {version}".format(version=version),
                 stable_version_file,
-            ]
+            )
             runcommand.run_command(
                 commit_command,
                 check=True,
                 show_trace=True,
                 dry_run=dry_run,
+                msgfile=msgfile,
+                **_output_kwargs(msgfile)
             )
 
 
-def main(*argv):  # pylint: disable=too-many-branches
-    """Do the thing"""
-    (prog, argv) = argparsing.grok_argv(argv)
-    argparser = argparsing.setup_argparse(prog=prog, description=DESCRIPTION)
-    _add_arguments(argparser)
-    args = argparser.parse_args(argv)
+def _plan_project(  # pylint: disable=too-many-branches,too-many-statements
+    args, repo_dir=None, msgfile=None, check_refs=False
+):
+    """
+    Work out how to tag the project in `repo_dir` (default: the current
+    directory), without changing anything.
 
-    if args.working_dir is not None:
-        runcommand.print_trace(["cd", args.working_dir], dry_run=args.dry_run)
-        os.chdir(args.working_dir)
+    If `check_refs` is true-ish, always look up the refs the plan depends on
+    (otherwise, only look them up when needed), so that they can be rechecked
+    before the plan is run later.
+
+    Returns a plan (see `_run_plan()`).
+    """
+    project_dir = None
+    if check_refs or args.version_file is None or args.stable_version_file is None:
+        project_dir = _get_project_dir(repo_dir, msgfile=msgfile)
 
     if args.version_file is None:
-        args.version_file = os.path.join(_get_project_dir(), DEFAULT_VERSION_FILENAME)
+        args.version_file = os.path.join(project_dir, DEFAULT_VERSION_FILENAME)
 
     if args.stable_version_file is None:
         args.stable_version_file = os.path.join(
-            _get_project_dir(), DEFAULT_STABLE_VERSION_FILENAME
+            project_dir, DEFAULT_STABLE_VERSION_FILENAME
         )
 
     with open(args.version_file, "r") as version_file:
@@ -292,103 +518,505 @@ def main(*argv):  # pylint: disable=too-many-branches
     if args.stable_message is None:
         args.stable_message = project_version
 
-    base_tag_command = ["git", "tag"]
+    tag_ref = "refs/tags/{tag}".format(tag=project_version)
+    commit = "HEAD" if args.commit is None else args.commit
+    refs = {}
+    if check_refs or args.rewrite_history:
+        refs = _get_ref_objects([commit, tag_ref], repo_dir=repo_dir, msgfile=msgfile)
+
+    branch_ref = None
+    if args.stable and (check_refs or (args.push and args.atomic)):
+        branch_ref = _get_branch_ref(repo_dir=repo_dir, msgfile=msgfile)
+
+    steps = []
+
+    base_tag_command = _git_command(repo_dir, "tag")
 
     tag_command = list(base_tag_command)
     tag_command.extend(["-a", "-m", args.message])
 
     if args.rewrite_history:
         tag_command.append("--force")
-        if _does_tag_exist(project_version):
+        if refs[tag_ref] is not None:
             for message in [
                 "CAUTION!!! History may be rewritten!",
                 _get_safety_message(),
             ]:
-                runcommand.print_trace([message], trace_prefix="", dry_run=args.dry_run)
+                steps.append({"message": [message]})
             if args.peril_sensitive_sunglasses:
-                runcommand.print_trace(
-                    ["Peril-sensitive sunglasses deployed, proceeding anyway..."],
-                    trace_prefix="",
-                    dry_run=args.dry_run,
-                )
-            elif not _should_continue(dry_run=args.dry_run):
-                runcommand.print_trace(
-                    ["Aborting..."], trace_prefix="", dry_run=args.dry_run
+                steps.append(
+                    {
+                        "message": [
+                            "Peril-sensitive sunglasses deployed, proceeding anyway..."
+                        ]
+                    }
                 )
-                return 1
+            else:
+                steps.append({"confirm": True})
 
     tag_command.append(project_version)
 
     if args.commit is not None:
         tag_command.append(args.commit)
 
-    try:
+    if args.stable:
+        # Must do this before tagging
+        steps.append(
+            {
+                "store_stable_version": {
+                    "version": bare_project_version,
+                    "stable_version_file": os.path.abspath(args.stable_version_file),
+                }
+            }
+        )
+
+    steps.append({"run": tag_command})
+
+    if args.stable:
+        stable_tag_command = list(base_tag_command)
+        stable_tag_command.extend(["--force", args.stable_tag])
+        if args.commit is not None:
+            stable_tag_command.append(args.commit)
+        steps.append({"message": ["Tagging", project_version, "as stable ..."]})
+        steps.append({"run": stable_tag_command})
+
+    if args.push and args.atomic:
+        push_refspecs = []
         if args.stable:
-            # Must do this before tagging
-            _store_stable_version(
-                bare_project_version, args.stable_version_file, dry_run=args.dry_run
+            push_refspecs.append(
+                _get_branch_refspec(branch_ref, repo_dir=repo_dir, msgfile=msgfile)
             )
+        push_refspecs.append("+refs/tags/{tag}".format(tag=project_version))
+        if args.stable:
+            push_refspecs.append("+refs/tags/{tag}".format(tag=args.stable_tag))
+        push_command = _git_command(repo_dir, "push", "--atomic", PUSH_REMOTE)
+        push_command.extend(push_refspecs)
+        steps.append({"run": push_command})
 
-        runcommand.run_command(
-            tag_command,
-            check=True,
-            show_trace=True,
-            dry_run=args.dry_run,
+    elif args.push:
+        base_push_command = _git_command(repo_dir, "push")
+        if args.stable:
+            # Push updated stable version file
+            steps.append({"run": base_push_command})
+
+        push_command = list(base_push_command)
+        if args.rewrite_history:
+            push_command.append("--force")
+        push_command.extend(
+            [PUSH_REMOTE, "+refs/tags/{tag}".format(tag=project_version)]
         )
+        steps.append({"run": push_command})
 
         if args.stable:
-            stable_tag_command = list(base_tag_command)
-            stable_tag_command.extend(["--force", args.stable_tag])
-            if args.commit is not None:
-                stable_tag_command.append(args.commit)
-            runcommand.print_trace(
-                ["Tagging", project_version, "as stable ..."],
-                trace_prefix="",
-                dry_run=args.dry_run,
-            )
-            runcommand.run_command(
-                stable_tag_command,
-                check=True,
-                show_trace=True,
-                dry_run=args.dry_run,
+            push_command = list(base_push_command)
+            push_command.extend(
+                ["--force", PUSH_REMOTE, "+refs/tags/{tag}".format(tag=args.stable_tag)]
             )
+            steps.append({"run": push_command})
+
+    return {
+        "format": PLAN_FORMAT,
+        "project_dir": project_dir,
+        "version": bare_project_version,
+        "tag": project_version,
+        "stable_tag": args.stable_tag if args.stable else None,
+        "branch": branch_ref,
+        "refs": refs,
+        "steps": steps,
+    }
+
 
-        if args.push:
-            base_push_command = ["git", "push"]
-            if args.stable:
-                # Push updated stable version file
+def _run_plan(prog, plan, dry_run, repo_dir=None, msgfile=None, interactive=True):
+    """
+    Carry out the steps in `plan`, in order.
+
+    Each step is a dictionary with one of the following keys:
+
+    - ``run``: a command to run
+    - ``message``: the words of a message to print
+    - ``confirm``: ask whether to continue, and abort if not
+    - ``store_stable_version``: arguments for `_store_stable_version()`
+
+    Returns the exit status.
+    """
+    try:
+        for step in plan["steps"]:
+            if "message" in step:
+                runcommand.print_trace(
+                    step["message"], trace_prefix="", dry_run=dry_run, msgfile=msgfile
+                )
+            elif "confirm" in step:
+                if not _should_continue(
+                    dry_run=dry_run, interactive=interactive, msgfile=msgfile
+                ):
+                    runcommand.print_trace(
+                        ["Aborting..."],
+                        trace_prefix="",
+                        dry_run=dry_run,
+                        msgfile=msgfile,
+                    )
+                    return 1
+            elif "store_stable_version" in step:
+                _store_stable_version(
+                    dry_run=dry_run,
+                    repo_dir=repo_dir,
+                    msgfile=msgfile,
+                    **step["store_stable_version"]
+                )
+            else:
                 runcommand.run_command(
-                    base_push_command, check=True, show_trace=True, dry_run=args.dry_run
+                    step["run"],
+                    check=True,
+                    show_trace=True,
+                    dry_run=dry_run,
+                    msgfile=msgfile,
+                    **_output_kwargs(msgfile)
                 )
+    except subprocess.CalledProcessError as e:
+        msgfile = sys.stderr if msgfile is None else msgfile
+        print("{prog}: error: {e}".format(prog=prog, e=e), file=msgfile)
+        return 1
 
-            push_command = list(base_push_command)
-            if args.rewrite_history:
-                push_command.append("--force")
-            push_command.extend(
-                ["origin", "+refs/tags/{tag}".format(tag=project_version)]
+    return 0
+
+
+def _tag_project(prog, args, repo_dir=None, msgfile=None, interactive=True):
+    """
+    Tag the project in `repo_dir` (default: the current directory).
+
+    Messages and command output go to `msgfile` (default: standard error and
+    standard output).  If `interactive` is false-ish, never prompt.
+
+    Returns a tuple (`status`, `project_version`).
+    """
+    plan = _plan_project(args, repo_dir=repo_dir, msgfile=msgfile)
+    status = _run_plan(
+        prog,
+        plan,
+        dry_run=args.dry_run,
+        repo_dir=repo_dir,
+        msgfile=msgfile,
+        interactive=interactive,
+    )
+    return (status, plan["tag"])
+
+
+def _write_plan(plan, plan_path):
+    """Write `plan` as JSON to `plan_path` ('-' means standard output)"""
+    import json  # pylint: disable=import-outside-toplevel
+
+    if plan_path == "-":
+        json.dump(plan, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        return
+    with open(plan_path, "w") as f:
+        json.dump(plan, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _is_planned_command(command, plan):
+    """Return whether `command` is one `_plan_project()` could make for `plan`"""
+    if not isinstance(command, list) or command[:1] != ["git"]:
+        return False
+    words = command[1:]
+
+    if words[:1] == ["tag"]:
+        if words[1:3] == ["-a", "-m"] and len(words) > 3:
+            # Skip the message
+            words = words[4:]
+            if words[:1] == ["--force"]:
+                words = words[1:]
+            tag = plan["tag"]
+        elif words[1:2] == ["--force"] and plan["stable_tag"] is not None:
+            words = words[2:]
+            tag = plan["stable_tag"]
+        else:
+            return False
+        # The tag, optionally followed by the commit to tag
+        return (
+            words[:1] == [tag]
+            and len(words) <= 2
+            and not any(word.startswith("-") for word in words)
+        )
+
+    if words[:1] == ["push"]:
+        words = words[1:]
+        if not words:
+            # Push updated stable version file
+            return plan["stable_tag"] is not None
+        refspecs = set(["+refs/tags/{tag}".format(tag=plan["tag"])])
+        if plan["stable_tag"] is not None:
+            refspecs.add("+refs/tags/{tag}".format(tag=plan["stable_tag"]))
+        branch_prefix = None
+        if words[0] == "--atomic":
+            if plan["stable_tag"] is not None and plan["branch"] is not None:
+                branch_prefix = "{branch}:refs/".format(branch=plan["branch"])
+            words = words[1:]
+        elif words[0] == "--force":
+            words = words[1:]
+        return (
+            words[:1] == [PUSH_REMOTE]
+            and len(words) > 1
+            and all(
+                word in refspecs
+                or (branch_prefix is not None and word.startswith(branch_prefix))
+                for word in words[1:]
             )
-            runcommand.run_command(
-                push_command, check=True, show_trace=True, dry_run=args.dry_run
+        )
+
+    return False
+
+
+def _is_planned_step(step, plan):
+    """Return whether `step` is one `_plan_project()` could make for `plan`"""
+    if not isinstance(step, dict) or len(step) != 1:
+        return False
+    (key, value) = list(step.items())[0]
+    if key not in PLAN_STEP_KEYS:
+        return False
+    if key == "run":
+        return _is_planned_command(value, plan)
+    if key == "message":
+        return isinstance(value, list)
+    if key == "store_stable_version":
+        project_dir = os.path.join(plan["project_dir"], "")
+        return (
+            isinstance(value, dict)
+            and set(value) == set(["version", "stable_version_file"])
+            and value["version"] == plan["version"]
+            and os.path.abspath(value["stable_version_file"]).startswith(project_dir)
+        )
+    return True
+
+
+def _read_plan(plan_path):
+    """Return the plan read from `plan_path` ('-' means standard input)"""
+    import json  # pylint: disable=import-outside-toplevel
+
+    if plan_path == "-":
+        plan = json.load(sys.stdin)
+    else:
+        with open(plan_path, "r") as f:
+            plan = json.load(f)
+
+    if not isinstance(plan, dict) or plan.get("format") != PLAN_FORMAT:
+        raise RuntimeError(
+            "{path}: not a plan, or plan format is not {format}".format(
+                path=plan_path, format=PLAN_FORMAT
+            )
+        )
+    missing_keys = sorted(PLAN_KEYS - set(plan))
+    if missing_keys:
+        raise RuntimeError(
+            "{path}: missing key(s) in plan: {keys}".format(
+                path=plan_path, keys=", ".join(missing_keys)
+            )
+        )
+    for step in plan["steps"]:
+        if not _is_planned_step(step, plan):
+            raise RuntimeError(
+                "{path}: not a step tag-version.py would plan: {step}".format(
+                    path=plan_path, step=json.dumps(step, sort_keys=True)
+                )
+            )
+    return plan
+
+
+def _get_stale_refs(plan, msgfile=None):
+    """Return a list of the refs in `plan` that have changed since it was made"""
+    stale_refs = []
+    if plan["refs"]:
+        refs = _get_ref_objects(plan["refs"], msgfile=msgfile)
+        stale_refs.extend(ref for ref in sorted(refs) if refs[ref] != plan["refs"][ref])
+    if plan["stable_tag"] is not None:
+        if _get_branch_ref(msgfile=msgfile) != plan["branch"]:
+            stale_refs.append("HEAD")
+    return stale_refs
+
+
+def _main_apply_plan(prog, args):
+    """Run a plan previously written using '--plan'"""
+    plan = _read_plan(args.apply_plan_file)
+
+    runcommand.print_trace(["cd", plan["project_dir"]], dry_run=args.dry_run)
+    os.chdir(plan["project_dir"])
+
+    stale_refs = _get_stale_refs(plan)
+    if stale_refs:
+        for ref in stale_refs:
+            print(
+                "{prog}: error: {ref} has changed since plan was made".format(
+                    prog=prog, ref=ref
+                ),
+                file=sys.stderr,
             )
+        return 1
+
+    return _run_plan(prog, plan, dry_run=args.dry_run)
+
+
+def _read_manifest(manifest_path):
+    """Return the list of repository entries in the batch manifest file"""
+    import json  # pylint: disable=import-outside-toplevel
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
 
-            if args.stable:
-                push_command = list(base_push_command)
-                push_command.extend(
-                    [
-                        "--force",
-                        "origin",
-                        "+refs/tags/{tag}".format(tag=args.stable_tag),
-                    ]
+    if not isinstance(manifest, list):
+        raise RuntimeError(
+            "{path}: manifest is not a list of repositories".format(path=manifest_path)
+        )
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    for entry in manifest:
+        if not isinstance(entry, dict):
+            entry = {"path": entry}
+        unknown_keys = sorted(set(entry) - set(MANIFEST_KEYS))
+        if unknown_keys:
+            raise RuntimeError(
+                "{path}: unknown key(s) in manifest entry: {keys}".format(
+                    path=manifest_path, keys=", ".join(unknown_keys)
                 )
-                runcommand.run_command(
-                    push_command, check=True, show_trace=True, dry_run=args.dry_run
+            )
+        if "path" not in entry:
+            raise RuntimeError(
+                "{path}: manifest entry has no 'path': {entry}".format(
+                    path=manifest_path, entry=json.dumps(entry)
                 )
+            )
+        entry = dict(entry)
+        entry["path"] = os.path.join(base_dir, entry["path"])
+        entries.append(entry)
+    return entries
+
+
+def _get_batch_args(args, entry):
+    """Return a copy of `args` as modified by the batch manifest `entry`"""
+    import copy  # pylint: disable=import-outside-toplevel
+
+    repo_args = copy.copy(args)
+    for (key, dest) in MANIFEST_KEYS.items():
+        if dest is not None and key in entry:
+            setattr(repo_args, dest, entry[key])
+    version_file = entry.get("version_file", args.version_file)
+    if version_file is not None:
+        repo_args.version_file = os.path.join(entry["path"], version_file)
+    if args.stable_version_file is not None:
+        repo_args.stable_version_file = os.path.join(
+            entry["path"], args.stable_version_file
+        )
+    return repo_args
 
-    except subprocess.CalledProcessError as e:
+
+def _tag_batch_entry(prog, args, entry):
+    """Tag one repository from a batch manifest, capturing all messages"""
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    repo_args = _get_batch_args(args, entry)
+    msgfile = tempfile.TemporaryFile(mode="w+")
+    try:
+        try:
+            (status, project_version) = _tag_project(
+                prog,
+                repo_args,
+                repo_dir=entry["path"],
+                msgfile=msgfile,
+                interactive=False,
+            )
+        except (EnvironmentError, RuntimeError, subprocess.CalledProcessError) as e:
+            print("{prog}: error: {e}".format(prog=prog, e=e), file=msgfile)
+            (status, project_version) = (1, None)
+        msgfile.seek(0)
+        messages = msgfile.read()
+    finally:
+        msgfile.close()
+    return {
+        "path": entry["path"],
+        "status": status,
+        "tag": project_version,
+        "messages": messages,
+    }
+
+
+def _print_batch_results(results, dry_run, outfile=None):
+    """Print a table of batch results to `outfile` (default: stdout)"""
+    outfile = sys.stdout if outfile is None else outfile
+    rows = [("STATUS", "TAG", "REPOSITORY")]
+    for result in results:
+        if result["status"] != 0:
+            status = "FAILED"
+        else:
+            status = "planned" if dry_run else "ok"
+        rows.append((status, result["tag"] or "-", result["path"]))
+    widths = [max(len(row[i]) for row in rows) for i in range(2)]
+    for row in rows:
+        print(
+            "{0:<{w0}}  {1:<{w1}}  {2}".format(*row, w0=widths[0], w1=widths[1]),
+            file=outfile,
+        )
+
+
+def _main_batch(prog, args):
+    """Tag all the repositories listed in the batch manifest"""
+    # pylint: disable=import-outside-toplevel
+    import functools
+    from multiprocessing.pool import ThreadPool
+
+    entries = _read_manifest(args.batch_manifest)
+    pool = ThreadPool(max(1, args.jobs))
+    try:
+        results = pool.map(functools.partial(_tag_batch_entry, prog, args), entries)
+    finally:
+        pool.close()
+        pool.join()
+
+    for result in results:
+        print("==> {path} <==".format(path=result["path"]), file=sys.stderr)
+        sys.stderr.write(result["messages"])
+    _print_batch_results(results, dry_run=args.dry_run)
+
+    return 1 if any(result["status"] != 0 for result in results) else 0
+
+
+def main(*argv):
+    """Do the thing"""
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(prog=prog, description=DESCRIPTION)
+    _add_arguments(argparser)
+    args = argparser.parse_args(argv)
+    profiling.setup_profiling(args)
+    if args.atomic:
+        args.push = True
+
+    if args.working_dir is not None:
+        runcommand.print_trace(["cd", args.working_dir], dry_run=args.dry_run)
+        os.chdir(args.working_dir)
+
+    try:
+        if args.batch_manifest is not None:
+            return _main_batch(prog, args)
+
+        if args.apply_plan_file is not None:
+            return _main_apply_plan(prog, args)
+
+        if args.plan_file is not None:
+            args.dry_run = True
+            plan = _plan_project(args, check_refs=True)
+            _write_plan(plan, args.plan_file)
+            return _run_plan(prog, plan, dry_run=True)
+
+        (status, _project_version) = _tag_project(prog, args)
+    except (
+        EnvironmentError,
+        RuntimeError,
+        ValueError,
+        subprocess.CalledProcessError,
+    ) as e:
         print("{prog}: error: {e}".format(prog=prog, e=e), file=sys.stderr)
         return 1
-
-    return 0
+    return status
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Run any of the project's utility scripts as a subcommand."""
+
+from __future__ import print_function
+
+import os.path
+import sys
+
+import utilutil.subcommands as subcommands
+
+SUBCOMMANDS = [
+    (
+        "install-hooks",
+        "pre-commit-tools/install-hooks.py",
+        "Install pre-commit hooks",
+    ),
+    (
+        "run-hooks",
+        "pre-commit-tools/run-hooks.py",
+        "Run pre-commit hooks",
+    ),
+    (
+        "run-manual-hooks",
+        "pre-commit-tools/run-manual-hooks.py",
+        "Run pre-commit hooks with manual stages",
+    ),
+    (
+        "seed-hook-config",
+        "pre-commit-tools/seed-hook-config.py",
+        "Create or print a sample .pre-commit-config.yaml",
+    ),
+    (
+        "update-hooks",
+        "pre-commit-tools/update-hooks.py",
+        "Update hooks in .pre-commit-config.yaml",
+    ),
+    (
+        "tag-version",
+        "tag-version.py",
+        "Add an annotated tag corresponding to the project version",
+    ),
+]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(*argv):
+    """Do the thing"""
+    return subcommands.main(SUBCOMMANDS, BASE_DIR, argv, description=__doc__)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv))
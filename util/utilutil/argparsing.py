@@ -3,8 +3,12 @@
 from __future__ import print_function
 
 import argparse
+import os
 import sys
 
+# Default number of hooks to run at once with '--parallel'
+DEFAULT_PARALLEL_JOBS = 4
+
 
 def grok_argv(argv):
     """
@@ -107,3 +111,170 @@ def add_chdir_argument(argparser):
         default=None,
         help="Directory to change to (default: current directory)",
     )
+
+
+def add_profile_arguments(argparser):
+    """
+    Add standardized "profile" arguments to an argument parser.
+
+    Use `utilutil.profiling.setup_profiling()`:py:func: with the parsed
+    arguments to act on them.
+
+    :Args:
+        argparser
+            The `argparse.ArgumentParser`:py:class: to add the arguments to
+
+    :Returns:
+        Nothing
+    """
+    argparser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        default=False,
+        help="At exit, print a summary of the slowest commands run",
+    )
+    argparser.add_argument(
+        "--profile-json",
+        dest="profile_json",
+        action="store",
+        default=None,
+        metavar="FILE",
+        help="At exit, write timings for all commands run to FILE as JSON",
+    )
+
+
+def add_incremental_argument(argparser):
+    """
+    Add a standardized "incremental" argument to an argument parser.
+
+    :Args:
+        argparser
+            The `argparse.ArgumentParser`:py:class: to add the argument to
+
+    :Returns:
+        Nothing
+    """
+    argparser.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        default=False,
+        help="Only check files which have changed since they last passed",
+    )
+
+
+def add_parallel_arguments(argparser, default_jobs=DEFAULT_PARALLEL_JOBS):
+    """
+    Add standardized "parallel" arguments for running hooks to an argument parser.
+
+    :Args:
+        argparser
+            The `argparse.ArgumentParser`:py:class: to add the arguments to
+
+        default_jobs
+            (optional) The default number of hooks to run at once
+
+    :Returns:
+        Nothing
+    """
+    argparser.add_argument(
+        "--parallel",
+        dest="parallel",
+        action="store_true",
+        default=False,
+        help="Run each hook separately, with several running at once",
+    )
+    argparser.add_argument(
+        "--jobs",
+        dest="jobs",
+        action="store",
+        type=int,
+        default=default_jobs,
+        help=(
+            "With --parallel, the number of hooks to run at once (default: {default})"
+        ).format(default=default_jobs),
+    )
+    argparser.add_argument(
+        "--read-only",
+        dest="read_only_hooks",
+        action="append",
+        default=[],
+        metavar="HOOK_ID",
+        help=(
+            "With --parallel, treat HOOK_ID as only reading files, so that it may "
+            "run at the same time as other such hooks (may be repeated)"
+        ),
+    )
+
+
+def add_hook_cache_arguments(argparser, cache_dir_env_var):
+    """
+    Add standardized arguments for sharing hook environments to an argument parser.
+
+    :Args:
+        argparser
+            The `argparse.ArgumentParser`:py:class: to add the arguments to
+
+        cache_dir_env_var
+            The name of an environment variable supplying a default cache
+            directory
+
+    :Returns:
+        Nothing
+    """
+    argparser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        action="store",
+        default=os.environ.get(cache_dir_env_var),
+        metavar="DIR",
+        help=(
+            "Keep hook repositories and environments in DIR, which may be shared "
+            "between clones (default: ${env_var}, if set)"
+        ).format(env_var=cache_dir_env_var),
+    )
+    argparser.add_argument(
+        "--mirror",
+        "--mirror-dir",
+        dest="mirror_dir",
+        action="store",
+        default=None,
+        metavar="DIR",
+        help="Fetch hook repositories from local mirrors in DIR",
+    )
+    argparser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        default=False,
+        help="Do not use the network (use the cache and mirrors only)",
+    )
+
+
+def parse_passthrough_arguments(argv, *add_argument_funcs):
+    """
+    Extract some standardized arguments from a list of arguments.
+
+    This is for programs that pass their other arguments through to another
+    command as-is.
+
+    :Args:
+        argv
+            A list of program arguments, _not_ including the program name
+
+        add_argument_funcs
+            Functions which add the arguments to extract to an argument parser
+            (e.g., `add_profile_arguments()`:py:func:)
+
+    :Returns:
+        A tuple (`args`, `argv`), where:
+
+        - `args` is an `argparse.Namespace`:py:class: with the extracted
+          arguments
+        - `argv` is the list of remaining program arguments
+    """
+    argparser = argparse.ArgumentParser(add_help=False)
+    for add_arguments in add_argument_funcs:
+        add_arguments(argparser)
+    return argparser.parse_known_args(argv)
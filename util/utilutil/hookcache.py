@@ -0,0 +1,250 @@
+"""Remember which files have passed pre-commit hooks, keyed by content hash."""
+
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import os.path
+import sys
+
+import utilutil.hookrunner as hookrunner
+import utilutil.runcommand as runcommand
+
+CONFIG = ".pre-commit-config.yaml"
+
+CACHE_FILENAME = "pre-commit-tools-cache.json"
+CACHE_VERSION = 1
+
+# Keep each command line well under the smallest common ARG_MAX
+MAX_FILES_ARGS_LENGTH = 64 * 1024
+
+BLOCK_SIZE = 64 * 1024
+
+# Paths from git are bytes; under Python 2, they are used as-is
+_fsdecode = getattr(os, "fsdecode", lambda path: path)
+
+
+def _iter_git_output(*words):
+    """
+    Iterate over the output of a git command, split on NUL characters.
+
+    The output is streamed (see `runcommand.iter_output()`:py:func:), so it is
+    never held in memory all at once.
+    """
+    remainder = b""
+    for chunk in runcommand.iter_output(["git"] + list(words), binary=True):
+        entries = (remainder + chunk).split(b"\0")
+        remainder = entries.pop()
+        for entry in entries:
+            if entry:
+                yield _fsdecode(entry)
+    if remainder:
+        yield _fsdecode(remainder)
+
+
+def get_file_digests():
+    """
+    Return content hashes for all files tracked by git.
+
+    Hashes for files which are unchanged from the git index are taken from the
+    index (so that git's own stat cache avoids re-reading them); other files are
+    hashed the same way git does.
+
+    :Returns:
+        A `dict`:py:class: mapping paths (relative to the current directory) to
+        hashes
+    """
+    digests = {}
+    for entry in _iter_git_output("ls-files", "--stage", "-z"):
+        (info, path) = entry.split("\t", 1)
+        (_mode, digest, stage) = info.split()
+        # Unmerged paths have non-zero stages; always check them
+        digests[path] = digest if stage == "0" else None
+    for path in _iter_git_output("ls-files", "--modified", "-z"):
+        digests[path] = None
+    for (path, digest) in list(digests.items()):
+        if not os.path.isfile(path):
+            del digests[path]
+        elif digest is None:
+            digests[path] = hash_file(path)
+    return digests
+
+
+def hash_file(path):
+    """Return the git blob hash of the contents of the file at `path`."""
+    hasher = hashlib.sha1()
+    hasher.update("blob {size}\0".format(size=os.path.getsize(path)).encode("ascii"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def get_config_digest(config_path=CONFIG):
+    """Return a hash of the pre-commit config file (including hook revisions)."""
+    hasher = hashlib.sha1()
+    with open(config_path, "rb") as f:
+        hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def get_cache_path():
+    """Return the path to the cache file inside the git directory."""
+    (git_dir,) = runcommand.run_command(
+        ["git", "rev-parse", "--git-dir"], return_output=True
+    ).splitlines()
+    return os.path.join(git_dir, CACHE_FILENAME)
+
+
+def load_cache(cache_path, config_digest):
+    """
+    Load the hook cache, discarding it if the pre-commit config has changed.
+
+    :Returns:
+        A `dict`:py:class: mapping a key for the hooks run (see
+        `get_run_key()`:py:func:) to a `dict`:py:class: of passed file paths and
+        their hashes
+    """
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if (
+        cache.get("version") != CACHE_VERSION
+        or cache.get("config_digest") != config_digest
+    ):
+        return {}
+    return cache.get("runs", {})
+
+
+def save_cache(cache_path, config_digest, runs):
+    """Save the hook cache (see `load_cache()`:py:func:)."""
+    cache = {
+        "version": CACHE_VERSION,
+        "config_digest": config_digest,
+        "runs": runs,
+    }
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cache, f)
+    os.rename(temp_path, cache_path)
+
+
+def get_run_key(args):
+    """Return a key identifying the hooks selected by pre-commit `args`."""
+    return "\0".join(args)
+
+
+def partition_files(paths, max_length=MAX_FILES_ARGS_LENGTH):
+    """Split `paths` into lists whose total length is at most `max_length`."""
+    partition = []
+    length = 0
+    for path in paths:
+        if partition and length + len(path) + 1 > max_length:
+            yield partition
+            partition = []
+            length = 0
+        partition.append(path)
+        length += len(path) + 1
+    if partition:
+        yield partition
+
+
+def _set_config_path(command, config_path):
+    """Return a copy of `command` with any ``-c``/``--config`` set to `config_path`."""
+    command = list(command)
+    for (i, word) in enumerate(command):
+        if word in ["-c", "--config"] and i + 1 < len(command):
+            command[i + 1] = config_path
+        elif word.startswith("--config="):
+            command[i] = "--config=" + config_path
+    return command
+
+
+def _run_serial(command):
+    """Run a pre-commit command as-is, returning its exit status."""
+    return runcommand.run_command(command, check=False, show_trace=True)
+
+
+def run_incremental(command, msgfile=None, run=None):
+    """
+    Run pre-commit `command` on only those files which have not yet passed.
+
+    Like pre-commit itself, this changes to the top-level directory of the git
+    project first.  If there is no pre-commit config file (as given by
+    ``-c``/``--config`` in `command`, or the default), simply run the command
+    on all files.
+
+    :Args:
+        command
+            The pre-commit command and its arguments, without any arguments
+            selecting files (such as ``--all-files`` or ``--files``)
+
+        msgfile
+            (optional) Where to print messages (default: standard error)
+
+        run
+            (optional) A function which runs a pre-commit command and returns
+            its exit status (default: run it as-is)
+
+    :Returns:
+        The exit status of the command (or 0 if there was nothing to check)
+    """
+    msgfile = sys.stderr if msgfile is None else msgfile
+    run = _run_serial if run is None else run
+    (project_dir,) = runcommand.run_command(
+        ["git", "rev-parse", "--show-toplevel"], return_output=True
+    ).splitlines()
+    # Resolve a relative config path before changing directory, as pre-commit
+    # does
+    config_path = os.path.abspath(
+        hookrunner.get_config_path(command[2:], project_dir=project_dir)
+    )
+    command = _set_config_path(command, config_path)
+    runcommand.print_trace(["cd", project_dir], msgfile=msgfile)
+    os.chdir(project_dir)
+
+    if not os.path.exists(config_path):
+        return run(command + ["--all-files"])
+
+    config_digest = get_config_digest(config_path)
+    cache_path = get_cache_path()
+    runs = load_cache(cache_path, config_digest)
+    run_key = get_run_key(command)
+
+    digests = get_file_digests()
+    passed = dict(
+        (path, digest)
+        for (path, digest) in runs.get(run_key, {}).items()
+        if digests.get(path) == digest
+    )
+    changed = sorted(path for path in digests if path not in passed)
+    print(
+        "Incremental: {changed} of {total} file(s) to check".format(
+            changed=len(changed), total=len(digests)
+        ),
+        file=msgfile,
+    )
+
+    status = 0
+    if len(changed) == len(digests):
+        partitions = [None] if changed else []
+    else:
+        partitions = partition_files(changed)
+    for partition in partitions:
+        if partition is None:
+            files_args = ["--all-files"]
+            partition = changed
+        else:
+            files_args = ["--files"] + partition
+        partition_status = run(command + files_args)
+        if partition_status == 0:
+            passed.update((path, digests[path]) for path in partition)
+        else:
+            status = partition_status
+
+    runs[run_key] = passed
+    save_cache(cache_path, config_digest, runs)
+    return status
@@ -0,0 +1,187 @@
+"""Share pre-commit hook repositories and environments between clones."""
+
+from __future__ import print_function
+
+import os
+import os.path
+import re
+import sys
+
+import utilutil.precommitconfig as precommitconfig
+
+CACHE_DIR_ENV_VAR = "PRE_COMMIT_TOOLS_CACHE"
+
+# Where pre-commit keeps its own database of cloned repositories
+STORE_DB_FILENAME = "db.db"
+
+# Hook "repositories" which are not cloned
+LOCAL_REPOS = frozenset(["local", "meta"])
+
+_URL_PREFIX_PATTERN = re.compile(r"^([A-Za-z][A-Za-z0-9+.-]*://)?([^@/]+@)?")
+
+
+def get_store_dir(cache_dir):
+    """
+    Return the directory to use as ``PRE_COMMIT_HOME`` for `cache_dir`.
+
+    This is `cache_dir` itself: pre-commit already keys repositories by URL and
+    revision, and their environments by language version, so one store can be
+    shared by every clone.
+    """
+    return os.path.abspath(cache_dir)
+
+
+def get_hook_repos(config):
+    """Return a list of (`url`, `rev`) for each remote hook repository."""
+    return [
+        (repo["repo"], repo.get("rev"))
+        for repo in config.get("repos", [])
+        if repo["repo"] not in LOCAL_REPOS
+    ]
+
+
+def get_mirror_path(mirror_dir, url):
+    """
+    Return the path to a local mirror of the repository at `url`, if any.
+
+    A mirror of, e.g., ``https://github.com/pre-commit/pre-commit-hooks`` is
+    looked for at ``github.com/pre-commit/pre-commit-hooks`` (with or without a
+    ``.git`` suffix) inside `mirror_dir`.
+    """
+    relative_path = _URL_PREFIX_PATTERN.sub("", url).replace(":", "/").strip("/")
+    if relative_path.endswith(".git"):
+        relative_path = relative_path[: -len(".git")]
+    for suffix in ["", ".git"]:
+        path = os.path.join(os.path.abspath(mirror_dir), relative_path + suffix)
+        if os.path.isdir(path):
+            return path
+    return None
+
+
+def get_cached_repos(store_dir):
+    """Return a set of (`url`, `rev`) for repositories already in the store."""
+    # pylint: disable=import-outside-toplevel
+    import sqlite3
+
+    db_path = os.path.join(store_dir, STORE_DB_FILENAME)
+    if not os.path.exists(db_path):
+        return set()
+    cached = set()
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute("SELECT repo, ref, path FROM repos")
+        for (repo, ref, path) in rows:
+            if os.path.isdir(path):
+                cached.add((repo, ref))
+    except sqlite3.Error:
+        return set()
+    finally:
+        connection.close()
+    return cached
+
+
+def _is_cached(cached, url, rev):
+    """Return whether the repository `url` at `rev` is in `cached`."""
+    if (url, rev) in cached:
+        return True
+    # Repositories with additional dependencies are named 'url:deps'
+    prefix = url + ":"
+    return any(x[1] == rev and x[0].startswith(prefix) for x in cached)
+
+
+def setup_environment(
+    cache_dir=None,
+    mirror_dir=None,
+    offline=False,
+    config_path=precommitconfig.CONFIG,
+    msgfile=None,
+):
+    """
+    Return environment variables for running pre-commit with a shared cache.
+
+    Reports cache (and mirror) hits and misses for each hook repository.
+
+    :Args:
+        cache_dir
+            (optional) A directory for pre-commit's repositories and
+            environments, which may be shared between clones
+
+        mirror_dir
+            (optional) A directory of local mirrors of hook repositories (see
+            `get_mirror_path()`:py:func:), used instead of the network
+
+        offline
+            (optional) If `True`-ish, prevent git and pip from using the network
+
+        config_path
+            (optional) The path to the pre-commit config
+
+        msgfile
+            (optional) Where to print the report (default: standard error)
+
+    :Returns:
+        A `dict`:py:class: of environment variables (including the current
+        environment) to run pre-commit with, or `None` if none of `cache_dir`,
+        `mirror_dir`, or `offline` was given
+    """
+    if cache_dir is None and mirror_dir is None and not offline:
+        return None
+
+    msgfile = sys.stderr if msgfile is None else msgfile
+    env = dict(os.environ)
+    if os.path.exists(config_path):
+        config = precommitconfig.read_config(config_path)
+    else:
+        config = {}
+    hook_repos = get_hook_repos(config)
+
+    cached = set()
+    if cache_dir is not None:
+        store_dir = get_store_dir(cache_dir)
+        env["PRE_COMMIT_HOME"] = store_dir
+        cached = get_cached_repos(store_dir)
+        print("Hook cache: {path}".format(path=store_dir), file=msgfile)
+
+    mirrors = []
+    for (url, rev) in hook_repos:
+        status = []
+        if cache_dir is not None:
+            status.append("hit" if _is_cached(cached, url, rev) else "miss")
+        if mirror_dir is not None:
+            mirror_path = get_mirror_path(mirror_dir, url)
+            if mirror_path is not None:
+                mirrors.append((mirror_path, url))
+            status.append("mirror" if mirror_path is not None else "no-mirror")
+        if status:
+            print(
+                "  {status:<16} {url} {rev}".format(
+                    status=",".join(status), url=url, rev=rev
+                ),
+                file=msgfile,
+            )
+
+    if cache_dir is not None:
+        hits = sum(1 for (url, rev) in hook_repos if _is_cached(cached, url, rev))
+        print(
+            "Hook cache: {hits} hit(s), {misses} miss(es)".format(
+                hits=hits, misses=len(hook_repos) - hits
+            ),
+            file=msgfile,
+        )
+
+    if mirrors:
+        # Requires git 2.31 or later
+        count = int(env.get("GIT_CONFIG_COUNT", "0"))
+        for (mirror_path, url) in mirrors:
+            env["GIT_CONFIG_KEY_{n}".format(n=count)] = "url.{path}.insteadOf".format(
+                path=mirror_path
+            )
+            env["GIT_CONFIG_VALUE_{n}".format(n=count)] = url
+            count += 1
+        env["GIT_CONFIG_COUNT"] = str(count)
+
+    if offline:
+        env["GIT_ALLOW_PROTOCOL"] = "file"
+        env["PIP_NO_INDEX"] = "1"
+
+    return env
@@ -0,0 +1,273 @@
+"""Run pre-commit hooks concurrently, using one ``pre-commit run`` per hook."""
+
+from __future__ import print_function
+
+import os.path
+import subprocess
+import sys
+
+import utilutil.precommitconfig as precommitconfig
+import utilutil.runcommand as runcommand
+
+# Options of 'pre-commit run' which take a value (other than '--files')
+RUN_OPTIONS_WITH_VALUES = frozenset(
+    [
+        "-c",
+        "--config",
+        "--color",
+        "--hook-stage",
+        "-s",
+        "--source",
+        "--from-ref",
+        "-o",
+        "--origin",
+        "--to-ref",
+        "--commit-msg-filename",
+        "--prepare-commit-message-source",
+        "--commit-object-name",
+        "--remote-branch",
+        "--local-branch",
+        "--remote-name",
+        "--remote-url",
+        "--checkout-type",
+        "--is-squash-merge",
+        "--rewrite-command",
+    ]
+)
+
+
+# Hooks known only to read files, which are safe to run at the same time as
+# each other (hooks which may modify files run on their own)
+READ_ONLY_HOOKS = frozenset(
+    [
+        "check-added-large-files",
+        "check-ast",
+        "check-builtin-literals",
+        "check-case-conflict",
+        "check-docstring-first",
+        "check-executables-have-shebangs",
+        "check-json",
+        "check-merge-conflict",
+        "check-shebang-scripts-are-executable",
+        "check-symlinks",
+        "check-toml",
+        "check-vcs-permalinks",
+        "check-xml",
+        "check-yaml",
+        "debug-statements",
+        "detect-aws-credentials",
+        "detect-private-key",
+        "forbid-new-submodules",
+        "forbid-submodules",
+        "no-commit-to-branch",
+        "flake8",
+        "mypy",
+        "pylint",
+        "shellcheck",
+        "yamllint",
+    ]
+)
+
+
+# Hooks which only read files when configured with the given argument
+READ_ONLY_HOOK_ARGS = {
+    "black": "--check",
+    "isort": "--check-only",
+    "mixed-line-ending": "--fix=no",
+}
+
+
+def split_run_args(args):
+    """
+    Split arguments for ``pre-commit run`` into hook IDs and everything else.
+
+    :Returns:
+        A tuple (`hook_ids`, `other_args`)
+    """
+    hook_ids = []
+    other_args = []
+    args = list(args)
+    in_files = False
+    while args:
+        arg = args.pop(0)
+        if arg == "--":
+            other_args.append(arg)
+            other_args.extend(args)
+            break
+        if arg.startswith("-"):
+            other_args.append(arg)
+            in_files = arg == "--files"
+            if arg in RUN_OPTIONS_WITH_VALUES and args:
+                other_args.append(args.pop(0))
+        elif in_files:
+            other_args.append(arg)
+        else:
+            hook_ids.append(arg)
+    return (hook_ids, other_args)
+
+
+def _get_option_value(args, *options):
+    """Return the value of the last of `options` in `args`, if any."""
+    value = None
+    for (i, arg) in enumerate(args):
+        for option in options:
+            if arg == option and i + 1 < len(args):
+                value = args[i + 1]
+            elif arg.startswith(option + "="):
+                value = arg[len(option) + 1 :]
+    return value
+
+
+def get_config_path(args, project_dir=None):
+    """
+    Return the path to the config pre-commit would use given ``pre-commit run``
+    `args`, from `project_dir` (default: the top-level directory of the current
+    git project) unless `args` give one.
+    """
+    config_path = _get_option_value(args, "-c", "--config")
+    if config_path is not None:
+        return config_path
+    if project_dir is None:
+        (project_dir,) = runcommand.run_command(
+            ["git", "rev-parse", "--show-toplevel"], return_output=True
+        ).splitlines()
+    return os.path.join(project_dir, precommitconfig.CONFIG)
+
+
+def _run_hook(command):
+    """Run one hook, returning (`command`, `status`, `output`)."""
+    try:
+        output = runcommand.run_command(
+            command, return_output=True, stderr=subprocess.STDOUT
+        )
+        status = 0
+    except subprocess.CalledProcessError as e:
+        (status, output) = (e.returncode, e.output)
+    return (command, status, output)
+
+
+def _has_arg(args, arg):
+    """Return whether `arg` (e.g., ``--opt=value``) is in `args`, in either form."""
+    if arg in args:
+        return True
+    (option, equals, value) = arg.partition("=")
+    return bool(equals) and any(
+        args[i] == option and args[i + 1] == value for i in range(len(args) - 1)
+    )
+
+
+def is_read_only_hook(hook_id, config=None, read_only_hooks=()):
+    """
+    Return whether the hook `hook_id` is known only to read files.
+
+    A hook is read-only if it is in `read_only_hooks` or `READ_ONLY_HOOKS`, or
+    if every entry for it in `config` has the argument that makes it read-only
+    (see `READ_ONLY_HOOK_ARGS`).
+    """
+    if hook_id in read_only_hooks or hook_id in READ_ONLY_HOOKS:
+        return True
+    arg = READ_ONLY_HOOK_ARGS.get(hook_id)
+    if arg is None or config is None:
+        return False
+    hooks = [
+        hook
+        for repo in config.get("repos", [])
+        for hook in repo.get("hooks", [])
+        if hook["id"] == hook_id
+    ]
+    return bool(hooks) and all(_has_arg(hook.get("args", []), arg) for hook in hooks)
+
+
+def group_hook_ids(hook_ids, config=None, read_only_hooks=()):
+    """
+    Split `hook_ids` into groups of hooks which may safely run concurrently.
+
+    Consecutive read-only hooks (see `is_read_only_hook()`:py:func:) are
+    grouped together; every other hook (which might modify files) is in a
+    group of its own.
+
+    :Returns:
+        A list of lists of hook IDs, in the original order
+    """
+    groups = []
+    read_only_group = None
+    for hook_id in hook_ids:
+        if is_read_only_hook(hook_id, config, read_only_hooks):
+            if read_only_group is None:
+                read_only_group = []
+                groups.append(read_only_group)
+            read_only_group.append(hook_id)
+        else:
+            read_only_group = None
+            groups.append([hook_id])
+    return groups
+
+
+def run_parallel(command, jobs, outfile=None, read_only_hooks=()):
+    """
+    Run a ``pre-commit run`` command, running each hook concurrently.
+
+    Each hook ID given in `command` (or, if none, each hook in the config which
+    runs in the selected stage) is run using its own
+    ``pre-commit run <hook-id>``, but only hooks known not to modify files run
+    at the same time as each other (see `group_hook_ids()`:py:func:).  The
+    output of each is buffered and printed in order.
+
+    :Args:
+        command
+            The ``pre-commit run`` command and its arguments
+
+        jobs
+            (optional) The maximum number of hooks to run at once
+
+        outfile
+            (optional) Where to print hook output (default: standard output)
+
+        read_only_hooks
+            (optional) IDs of additional hooks to treat as read-only
+
+    :Returns:
+        The highest exit status of all the hooks (as for a single
+        ``pre-commit run``, this is nonzero if any hook failed)
+    """
+    # pylint: disable=import-outside-toplevel
+    from multiprocessing.pool import ThreadPool
+
+    outfile = sys.stdout if outfile is None else outfile
+    (base_command, args) = (command[:2], command[2:])
+    (hook_ids, other_args) = split_run_args(args)
+    config_path = get_config_path(other_args)
+    config = None
+    if os.path.exists(config_path):
+        config = precommitconfig.read_config(config_path)
+    if not hook_ids:
+        stage = _get_option_value(other_args, "--hook-stage")
+        hook_ids = precommitconfig.get_hook_ids(
+            {} if config is None else config,
+            stage=precommitconfig.DEFAULT_STAGE if stage is None else stage,
+        )
+    hook_groups = group_hook_ids(hook_ids, config, read_only_hooks)
+    if outfile.isatty() and _get_option_value(other_args, "--color") is None:
+        # Output is captured, so pre-commit would otherwise turn color off
+        other_args = ["--color", "always"] + other_args
+
+    status = 0
+    pool = ThreadPool(max(1, jobs))
+    try:
+        for hook_group in hook_groups:
+            hook_commands = [base_command + [x] + other_args for x in hook_group]
+            for (hook_command, hook_status, output) in pool.imap(
+                _run_hook, hook_commands
+            ):
+                outfile.flush()
+                runcommand.print_trace(hook_command)
+                outfile.write(output)
+                outfile.flush()
+                if hook_status < 0:
+                    # Killed by a signal; report it the way a shell would
+                    hook_status = 128 - hook_status
+                status = max(status, hook_status)
+    finally:
+        pool.close()
+        pool.join()
+    return status
@@ -0,0 +1,168 @@
+"""Read the parts of a `.pre-commit-config.yaml` needed by the pre-commit tools."""
+
+from __future__ import print_function
+
+import re
+
+CONFIG = ".pre-commit-config.yaml"
+
+# Old stage names which pre-commit still accepts
+STAGE_ALIASES = {
+    "commit": "pre-commit",
+    "merge-commit": "pre-merge-commit",
+    "push": "pre-push",
+}
+
+DEFAULT_STAGE = "pre-commit"
+
+_KEY_VALUE_PATTERN = re.compile(
+    r"^(?P<dash>-\s+)?(?P<key>[A-Za-z_]+):\s*(?P<value>.*)$"
+)
+
+
+def read_config(config_path=CONFIG):
+    """
+    Read a pre-commit config file.
+
+    Uses `yaml`:py:mod: (PyYAML, which pre-commit itself depends on) if it is
+    available; otherwise, falls back to a simple parser which understands the
+    block-style layout that pre-commit generates (see `parse_config()`).
+
+    :Returns:
+        The config as a `dict`:py:class:
+    """
+    with open(config_path, "r") as f:
+        text = f.read()
+    try:
+        import yaml  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return parse_config(text)
+    return yaml.safe_load(text) or {}
+
+
+def _parse_scalar(value):
+    """Parse a YAML scalar or flow-style list of scalars."""
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_scalar(x) for x in value[1:-1].split(",") if x.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def _strip_comment(line):
+    """Remove a trailing comment (outside of quotes) from a line of YAML."""
+    quote = None
+    for (i, char) in enumerate(line):
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "#" and (i == 0 or line[i - 1].isspace()):
+            return line[:i].rstrip()
+    return line.rstrip()
+
+
+def parse_config(text):  # pylint: disable=too-many-branches
+    """
+    Parse the text of a pre-commit config without a YAML library.
+
+    Only ``repos`` (with each repo's ``repo``, ``rev`` and ``hooks``),
+    ``default_language_version`` and ``default_stages`` are understood, along
+    with scalar or list values for each hook's keys.
+
+    :Returns:
+        The config as a `dict`:py:class:
+    """
+    config = {}
+    section = None
+    repo = None
+    hook = None
+    hook_indent = None
+    list_target = None
+
+    for line in text.splitlines():
+        line = _strip_comment(line)
+        if not line.strip() or line.strip() == "---":
+            continue
+        indent = len(line) - len(line.lstrip())
+        body = line.strip()
+
+        if list_target is not None:
+            (target, key, list_indent) = list_target
+            if body.startswith("- ") and indent >= list_indent:
+                target[key].append(_parse_scalar(body[2:]))
+                continue
+            list_target = None
+
+        match = _KEY_VALUE_PATTERN.match(body)
+        if match is None:
+            continue
+        (key, value) = (match.group("key"), match.group("value"))
+        if match.group("dash"):
+            indent += len(match.group("dash"))
+
+        if indent == 0:
+            section = key
+            if key == "repos":
+                config["repos"] = []
+            elif key == "default_language_version":
+                config[key] = {}
+            elif value:
+                config[key] = _parse_scalar(value)
+            else:
+                config[key] = []
+                list_target = (config, key, 0)
+            continue
+
+        if section == "default_language_version":
+            config[section][key] = _parse_scalar(value)
+        elif section == "repos":
+            if key == "repo" and match.group("dash"):
+                repo = {"repo": _parse_scalar(value), "hooks": []}
+                config["repos"].append(repo)
+                hook = None
+            elif repo is None:
+                continue
+            elif key == "id" and match.group("dash"):
+                hook = {"id": _parse_scalar(value)}
+                hook_indent = indent
+                repo["hooks"].append(hook)
+            elif key == "hooks":
+                hook = None
+            else:
+                target = hook if hook is not None and indent >= hook_indent else repo
+                if value:
+                    target[key] = _parse_scalar(value)
+                else:
+                    target[key] = []
+                    list_target = (target, key, indent)
+
+    return config
+
+
+def normalize_stage(stage):
+    """Return the current name for a pre-commit hook stage."""
+    return STAGE_ALIASES.get(stage, stage)
+
+
+def get_hook_ids(config, stage=DEFAULT_STAGE):
+    """
+    Return the IDs of the hooks in `config` which run in `stage`, in order.
+
+    Hooks listed more than once are only returned once.  Hooks whose stages are
+    not given in the config (by their ``stages`` or by ``default_stages``) are
+    assumed to run in all stages.
+    """
+    stage = normalize_stage(stage)
+    default_stages = config.get("default_stages")
+    hook_ids = []
+    for repo in config.get("repos", []):
+        for hook in repo.get("hooks", []):
+            stages = hook.get("stages", default_stages)
+            if stages and stage not in [normalize_stage(x) for x in stages]:
+                continue
+            if hook["id"] not in hook_ids:
+                hook_ids.append(hook["id"])
+    return hook_ids
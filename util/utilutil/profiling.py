@@ -0,0 +1,102 @@
+"""Record and report timings for commands run via `utilutil.runcommand`:py:mod:."""
+
+from __future__ import print_function
+
+import atexit
+import sys
+
+import utilutil.runcommand as runcommand
+
+DEFAULT_SUMMARY_LIMIT = 10
+
+
+class CommandProfile(object):
+    """
+    Collect records of commands run via `utilutil.runcommand`:py:mod:.
+
+    An instance is itself a command hook (see
+    `utilutil.runcommand.add_command_hook()`:py:func:).
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def slowest(self, limit=None):
+        """Return the `limit` slowest command records (all if `limit` is `None`)."""
+        records = sorted(self.records, key=lambda x: x["elapsed"], reverse=True)
+        return records if limit is None else records[:limit]
+
+    def print_summary(self, outfile=None, limit=DEFAULT_SUMMARY_LIMIT):
+        """Print a table of the `limit` slowest commands to `outfile`."""
+        outfile = sys.stderr if outfile is None else outfile
+        total = sum(x["elapsed"] for x in self.records)
+        print(
+            "Profile: {count} command(s), {total:.3f}s total".format(
+                count=len(self.records), total=total
+            ),
+            file=outfile,
+        )
+        if not self.records:
+            return
+        print(
+            "{0:>9}  {1:>6}  {2:>9}  {3:<11}  {4}".format(
+                "SECONDS", "STATUS", "OUTPUT", "VIA", "COMMAND"
+            ),
+            file=outfile,
+        )
+        for record in self.slowest(limit):
+            print(
+                "{0:>9.3f}  {1:>6}  {2:>9}  {3:<11}  {4}".format(
+                    record["elapsed"],
+                    "-" if record["status"] is None else record["status"],
+                    "-" if record["output_size"] is None else record["output_size"],
+                    record["spawn"],
+                    " ".join(record["args"]),
+                ),
+                file=outfile,
+            )
+        if limit is not None and len(self.records) > limit:
+            print(
+                "({count} more not shown)".format(count=len(self.records) - limit),
+                file=outfile,
+            )
+
+    def write_json(self, path):
+        """Write all command records, in the order they were run, to `path`."""
+        import json  # pylint: disable=import-outside-toplevel
+
+        with open(path, "w") as f:
+            json.dump({"commands": self.records}, f, indent=2)
+            f.write("\n")
+
+
+def setup_profiling(args):
+    """
+    Start profiling commands if requested, and arrange to report at exit.
+
+    :Args:
+        args
+            An `argparse.Namespace`:py:class: containing the arguments added by
+            `utilutil.argparsing.add_profile_arguments()`:py:func:
+
+    :Returns:
+        The `CommandProfile`:py:class: in use, or `None` if profiling was not
+        requested
+    """
+    if not args.profile and args.profile_json is None:
+        return None
+
+    profile = CommandProfile()
+    runcommand.add_command_hook(profile)
+
+    def _report():
+        if args.profile:
+            profile.print_summary()
+        if args.profile_json is not None:
+            profile.write_json(args.profile_json)
+
+    atexit.register(_report)
+    return profile
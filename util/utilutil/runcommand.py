@@ -2,20 +2,219 @@
 
 from __future__ import print_function
 
+import errno
+import io
 import os
+import signal
 import subprocess
 import sys
+import time
 
 TRACE_PREFIX = os.environ.get("PS4", "+ ")
+DEFAULT_CHUNK_SIZE = 64 * 1024
 DRY_RUN_PREFIX = "[DRY-RUN] "
 WET_RUN_PREFIX = ""
 
+SPAWN_POSIX = "posix_spawn"
+SPAWN_SUBPROCESS = "subprocess"
+
+# `subprocess`:py:mod: forks the parent process (and copies its page tables)
+# everywhere except on Linux with Python 3.10 or later, where it uses vfork();
+# `os.posix_spawn()`:py:func: only helps where it would otherwise fork (see
+# benchmarks/spawn-latency.py)
+_SUBPROCESS_FORKS = sys.version_info < (3, 10) or not sys.platform.startswith(
+    "linux"
+)
+
+# Set to `False` (or set UTILUTIL_NO_POSIX_SPAWN in the environment) to always
+# launch commands via `subprocess`:py:mod:
+USE_POSIX_SPAWN = (
+    _SUBPROCESS_FORKS
+    and hasattr(os, "posix_spawn")
+    and not os.environ.get("UTILUTIL_NO_POSIX_SPAWN")
+)
+
+# Signals which Python ignores, but which `subprocess`:py:mod: resets to their
+# defaults in the child (``restore_signals``=`True`)
+_RESTORE_SIGNALS = tuple(
+    getattr(signal, name)
+    for name in ["SIGPIPE", "SIGXFZ", "SIGXFSZ"]
+    if hasattr(signal, name)
+)
+
+# Keyword arguments which `_posix_spawn()` knows how to handle
+_POSIX_SPAWN_KWARGS = frozenset(["env", "stdin", "stdout", "stderr"])
+
+_COMMAND_HOOKS = []
+
+_clock = getattr(time, "perf_counter", time.time)
+
 
 def get_message_prefix(dry_run=False):
     """Return a standard dry-run or wet-run prefix for trace messages."""
     return DRY_RUN_PREFIX if dry_run else WET_RUN_PREFIX
 
 
+def add_command_hook(hook):
+    """
+    Register a function to be called after each command is run.
+
+    :Args:
+        hook
+            A callable taking a single argument, a `dict`:py:class: with the
+            following keys:
+
+            - ``args``: The words that formed the command
+            - ``elapsed``: The wall time taken by the command, in seconds
+            - ``status``: The exit status of the command, or `None` if it could
+              not be run
+            - ``output_size``: The size of the output captured from the
+              command, or `None` if output was not captured
+            - ``spawn``: How the command was launched, either `SPAWN_POSIX`
+              or `SPAWN_SUBPROCESS`
+
+    Hooks are not called for commands that are not run (see `dry_run` in
+    `run_command()`:py:func:).
+    """
+    _COMMAND_HOOKS.append(hook)
+
+
+def remove_command_hook(hook):
+    """Unregister a function previously added using `add_command_hook()`."""
+    _COMMAND_HOOKS.remove(hook)
+
+
+def _call_command_hooks(args, elapsed, status, output_size, spawn):
+    """Call all registered command hooks with the results of a command."""
+    if not _COMMAND_HOOKS:
+        return
+    record = {
+        "args": list(args),
+        "elapsed": elapsed,
+        "status": status,
+        "output_size": output_size,
+        "spawn": spawn,
+    }
+    for hook in list(_COMMAND_HOOKS):
+        hook(record)
+
+
+def choose_spawn(return_output=False, **kwargs):
+    """
+    Choose how to launch a command with the given `run_command()` options.
+
+    :Returns:
+        `SPAWN_POSIX` if the command can be launched using
+        `os.posix_spawn()`:py:func:, which avoids the cost of forking a large
+        parent process; otherwise, `SPAWN_SUBPROCESS`
+    """
+    if not USE_POSIX_SPAWN:
+        return SPAWN_SUBPROCESS
+    if not _POSIX_SPAWN_KWARGS.issuperset(kwargs):
+        return SPAWN_SUBPROCESS
+    for name in ["stdin", "stdout", "stderr"]:
+        target = kwargs.get(name)
+        if target == subprocess.PIPE:
+            return SPAWN_SUBPROCESS
+        if target == subprocess.STDOUT and name != "stderr":
+            return SPAWN_SUBPROCESS
+    if return_output and kwargs.get("stdout") is not None:
+        return SPAWN_SUBPROCESS
+    return SPAWN_POSIX
+
+
+def _add_redirect(file_actions, target, fd):
+    """Add a posix_spawn file action redirecting `fd` to `target`, if needed."""
+    if target is None:
+        return
+    if target == subprocess.DEVNULL:
+        file_actions.append((os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_RDWR, 0))
+    elif target == subprocess.STDOUT:
+        file_actions.append((os.POSIX_SPAWN_DUP2, 1, fd))
+    else:
+        source_fd = target if isinstance(target, int) else target.fileno()
+        file_actions.append((os.POSIX_SPAWN_DUP2, source_fd, fd))
+
+
+def _wait_for_exit(pid):
+    """Wait for process `pid` and return its status like `subprocess` does."""
+    (_pid, wait_status) = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(wait_status):
+        return -os.WTERMSIG(wait_status)
+    return os.WEXITSTATUS(wait_status)
+
+
+def _find_executable(name, env=None):
+    """
+    Return the path to the executable `name`, searching the ``PATH`` from `env`
+    (or the current environment) the same way `subprocess`:py:mod: does.
+
+    :Raises:
+        `OSError`:py:class: (with ``errno.ENOENT``) if there is no such
+        executable
+    """
+    if os.path.dirname(name):
+        return name
+    for directory in os.get_exec_path(env):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), name)
+
+
+def _posix_spawn(
+    args, return_output=False, env=None, stdin=None, stdout=None, stderr=None
+):
+    """
+    Launch a command using `os.posix_spawn()`:py:func: and wait for it.
+
+    :Returns:
+        A tuple (`status`, `output`), where `output` is the command's standard
+        output as text if `return_output` is `True`-ish, and `None` otherwise
+    """
+    env = os.environ if env is None else env
+    path = _find_executable(args[0], env)
+    file_actions = []
+    _add_redirect(file_actions, stdin, 0)
+    read_fd = None
+    if return_output:
+        # Both ends are close-on-exec; only the dup2()'d copy is inherited
+        (read_fd, write_fd) = os.pipe()
+        file_actions.append((os.POSIX_SPAWN_DUP2, write_fd, 1))
+    else:
+        _add_redirect(file_actions, stdout, 1)
+    _add_redirect(file_actions, stderr, 2)
+
+    try:
+        pid = os.posix_spawn(
+            path,
+            args,
+            env,
+            file_actions=file_actions,
+            setsigdef=_RESTORE_SIGNALS,
+        )
+    except BaseException:
+        if read_fd is not None:
+            os.close(read_fd)
+        raise
+    finally:
+        if read_fd is not None:
+            os.close(write_fd)
+
+    try:
+        output = None
+        if read_fd is not None:
+            with io.open(read_fd, "r") as f:
+                output = f.read()
+        return (_wait_for_exit(pid), output)
+    except BaseException:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        finally:
+            os.waitpid(pid, 0)
+        raise
+
+
 def print_trace(
     args, message_prefix=None, trace_prefix=TRACE_PREFIX, dry_run=False, msgfile=None
 ):
@@ -42,6 +241,22 @@ def print_trace(
     )
     msgfile = sys.stderr if msgfile is None else msgfile
     print("".join([message_prefix, trace_prefix, " ".join(args)]), file=msgfile)
+    msgfile.flush()
+
+
+def _trace_command(args, dry_run, show_trace, trace_prefix, msgfile):
+    """Print the dry-run message and/or trace for a command, as appropriate."""
+    if dry_run:
+        msgfile = sys.stderr if msgfile is None else msgfile
+        print(
+            "{prefix}Would run the following command:".format(
+                prefix=get_message_prefix(dry_run)
+            ),
+            file=msgfile,
+        )
+
+    if dry_run or show_trace:
+        print_trace(args, trace_prefix=trace_prefix, dry_run=dry_run, msgfile=msgfile)
 
 
 def run_command(
@@ -90,6 +305,10 @@ def run_command(
             `subprocess.call()`:py:meth:, `subprocess.check_call()`:py:meth:,
             or `subprocess.check_output()`:py:meth:
 
+    Where possible (see `choose_spawn()`:py:func:), the command is launched
+    using `os.posix_spawn()`:py:func: instead of `subprocess`:py:mod:, with
+    the same results.
+
     :Returns:
         - If `dry_run` is `True`, returns `None` if `return_output` is `True`,
           or 0 if `return_output` is `False`; otherwise,
@@ -103,21 +322,170 @@ def run_command(
         See `subprocess.check_output()`:py:meth:,
         `subprocess.check_call()`:py:meth:, and `subprocess.call()`:py:meth:.
     """
+    _trace_command(
+        args,
+        dry_run=dry_run,
+        show_trace=show_trace,
+        trace_prefix=trace_prefix,
+        msgfile=msgfile,
+    )
     if dry_run:
-        msgfile = sys.stderr if msgfile is None else msgfile
-        print(
-            "{prefix}Would run the following command:".format(
-                prefix=get_message_prefix(dry_run)
-            ),
-            file=msgfile,
+        return None if return_output else 0
+
+    spawn = choose_spawn(return_output=return_output, **kwargs)
+    status = None
+    output = None
+    start = _clock()
+    try:
+        if spawn == SPAWN_POSIX:
+            (status, output) = _posix_spawn(args, return_output=return_output, **kwargs)
+            if status != 0 and (check or return_output):
+                raise subprocess.CalledProcessError(status, args, output=output)
+            return output if return_output else status
+        if return_output:
+            output = subprocess.check_output(args, universal_newlines=True, **kwargs)
+            status = 0
+            return output
+        if check:
+            status = subprocess.check_call(args, **kwargs)
+        else:
+            status = subprocess.call(args, **kwargs)
+        return status
+    except subprocess.CalledProcessError as e:
+        status = e.returncode
+        output = e.output
+        raise
+    finally:
+        _call_command_hooks(
+            args,
+            elapsed=_clock() - start,
+            status=status,
+            output_size=None if output is None else len(output),
+            spawn=spawn,
         )
 
-    if dry_run or show_trace:
-        print_trace(args, trace_prefix=trace_prefix, dry_run=dry_run)
+
+def iter_output(
+    args,
+    check=True,
+    dry_run=False,
+    binary=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    show_trace=False,
+    trace_prefix=TRACE_PREFIX,
+    msgfile=None,
+    # fmt: off
+    **kwargs
+    # fmt: on
+):
+    """
+    Run a command and iterate over its output as it is produced.
+
+    Unlike `run_command()`:py:func: with `return_output` set, the output is
+    never held in memory all at once, so this is suitable for commands with
+    very large output.  If the caller stops iterating early (for example, by
+    breaking out of a loop, or by calling ``close()`` on the returned
+    generator), the command is killed.
+
+    :Args:
+        args
+            The words that form the command
+
+        check
+            (optional) If `True`-ish, raise an exception if the command returns
+            unsuccessful status once its output is exhausted (same as
+            `subprocess.check_output()`:py:meth:); otherwise, ignore the status
+
+        dry_run
+            (optional) If `True`-ish, only print what command would run without
+            executing it
+
+        binary
+            (optional) If `True`-ish, yield raw chunks of bytes as they arrive;
+            otherwise, yield lines of text (decoded as with
+            ``universal_newlines``=`True`, and including the trailing newline)
+
+        chunk_size
+            (optional) When `binary` is `True`-ish, the maximum number of bytes
+            to yield at a time
+
+        show_trace
+            (optional) If `True`-ish, print a trace of the command right before
+            it is executed
+
+        trace_prefix
+            (optional) The text to prepend to a trace message
+
+        kwargs
+            (optional) Any additional keyword arguments to pass to
+            `subprocess.Popen`:py:class:
+
+    The trace (and, if `dry_run` is `True`, the dry-run message) is printed
+    right away, when `iter_output()` is called; the command itself starts when
+    the caller starts iterating.
+
+    :Returns:
+        An iterator yielding lines or chunks of output; if `dry_run` is `True`,
+        the iterator yields nothing.
+
+    :Raises:
+        See `subprocess.Popen`:py:class:; also, if `check` is `True`, raises
+        `subprocess.CalledProcessError`:py:class: when the command returns
+        unsuccessful status.
+    """
+    _trace_command(
+        args,
+        dry_run=dry_run,
+        show_trace=show_trace,
+        trace_prefix=trace_prefix,
+        msgfile=msgfile,
+    )
     if dry_run:
-        return None if return_output else 0
-    if return_output:
-        return subprocess.check_output(args, universal_newlines=True, **kwargs)
-    if check:
-        return subprocess.check_call(args, **kwargs)
-    return subprocess.call(args, **kwargs)
+        return iter(())
+
+    return _iter_output(args, check, binary, chunk_size, **kwargs)
+
+
+def _iter_output(
+    args,
+    check,
+    binary,
+    chunk_size,
+    # fmt: off
+    **kwargs
+    # fmt: on
+):
+    """Run a command and yield its output (see `iter_output()`:py:func:)."""
+    start = _clock()
+    process = subprocess.Popen(
+        args, stdout=subprocess.PIPE, universal_newlines=not binary, **kwargs
+    )
+    exhausted = False
+    output_size = 0
+    try:
+        if binary:
+            fd = process.stdout.fileno()
+            for chunk in iter(lambda: os.read(fd, chunk_size), b""):
+                output_size += len(chunk)
+                yield chunk
+        else:
+            # Avoid the read-ahead buffering of file iteration under Python 2
+            for line in iter(process.stdout.readline, ""):
+                output_size += len(line)
+                yield line
+        exhausted = True
+    finally:
+        if not exhausted and process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+        _call_command_hooks(
+            args,
+            elapsed=_clock() - start,
+            status=returncode,
+            output_size=output_size,
+            spawn=SPAWN_SUBPROCESS,
+        )
+
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, args)
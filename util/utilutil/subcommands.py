@@ -0,0 +1,121 @@
+"""Run several scripts as subcommands of a single program, loading them lazily."""
+
+from __future__ import print_function
+
+import os.path
+import sys
+
+import utilutil.argparsing as argparsing
+
+
+def load_script(path, module_name):
+    """
+    Load a Python script as a module without running it as ``__main__``.
+
+    :Args:
+        path
+            The path to the script (which need not be a valid module name)
+
+        module_name
+            The name to give the loaded module
+
+    :Returns:
+        The loaded module
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        import importlib.util
+    except ImportError:  # Python 2
+        import imp
+
+        return imp.load_source(module_name, path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_subcommand(name, subcommands, base_dir):
+    """
+    Load the module implementing a subcommand.
+
+    :Args:
+        name
+            The name of the subcommand
+
+        subcommands
+            A list of (`name`, `path`, `help`) tuples describing the available
+            subcommands, where `path` is relative to `base_dir`
+
+        base_dir
+            The directory containing the subcommand scripts
+
+    :Returns:
+        The loaded module, which must have a ``main(*argv)`` function
+
+    :Raises:
+        `KeyError`:py:exc: if there is no such subcommand
+    """
+    paths = {x[0]: x[1] for x in subcommands}
+    module_name = "_subcommand_{name}".format(name=name.replace("-", "_"))
+    return load_script(os.path.join(base_dir, paths[name]), module_name)
+
+
+def _format_subcommands(subcommands):
+    """Return help text listing the available subcommands"""
+    width = max(len(x[0]) for x in subcommands)
+    lines = ["subcommands:"]
+    for (name, _path, help_text) in subcommands:
+        lines.append("  {0:<{width}}  {1}".format(name, help_text, width=width))
+    return "\n".join(lines)
+
+
+def main(subcommands, base_dir, argv, description=None):
+    """
+    Parse the subcommand name from `argv` and run the subcommand.
+
+    Only the chosen subcommand's module is loaded, and the remaining arguments
+    are parsed by the subcommand itself.
+
+    :Args:
+        subcommands
+            A list of (`name`, `path`, `help`) tuples describing the available
+            subcommands (see `load_subcommand()`:py:func:)
+
+        base_dir
+            The directory containing the subcommand scripts
+
+        argv
+            A list of program arguments, including the program "name" as the
+            zero-th argument (see `sys.argv`:py:attr:)
+
+        description
+            (optional) The program description, if any
+
+    :Returns:
+        The exit status of the subcommand
+    """
+    (prog, argv) = argparsing.grok_argv(argv)
+    argparser = argparsing.setup_argparse(
+        prog=prog,
+        description=description,
+        epilog=_format_subcommands(subcommands),
+        formatter_class=argparsing.argparse.RawDescriptionHelpFormatter,
+    )
+    argparser.add_argument(
+        "subcommand",
+        metavar="SUBCOMMAND",
+        choices=[x[0] for x in subcommands],
+        help="The subcommand to run (see below)",
+    )
+    argparser.add_argument(
+        "args",
+        metavar="ARG",
+        nargs=argparsing.argparse.REMAINDER,
+        help="Arguments for the subcommand (see 'SUBCOMMAND --help')",
+    )
+    args = argparser.parse_args(argv)
+
+    module = load_subcommand(args.subcommand, subcommands, base_dir)
+    subprog = " ".join([prog if prog else sys.argv[0], args.subcommand])
+    return module.main(subprog, *args.args)